@@ -4,6 +4,7 @@ Database layer for messages, chat rooms, and analytics
 """
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from bson import ObjectId
 from pymongo import DESCENDING, ASCENDING
 from pymongo.collection import Collection
 import logging
@@ -258,12 +259,10 @@ class DoctorChatRepository:
                 except Exception as e:
                     logger.warning(f"Failed to serialize chat room {room_data.get('room_id', 'unknown')}: {str(e)}")
                     # Fallback: manually convert ObjectId fields and return raw data
-                    clean_room_data = {}
-                    for key, value in room_data.items():
-                        if hasattr(value, 'generation_time'):  # ObjectId
-                            clean_room_data[key] = str(value)
-                        else:
-                            clean_room_data[key] = value
+                    clean_room_data = {
+                        key: str(value) if isinstance(value, ObjectId) else value
+                        for key, value in room_data.items()
+                    }
                     serialized_rooms.append(clean_room_data)
             
             return serialized_rooms
@@ -477,9 +476,8 @@ class DoctorChatRepository:
                         msg_data['message_id'] = str(msg_data['_id'])
                     
                     # Convert ObjectId fields to strings
-                    for key, value in msg_data.items():
-                        if hasattr(value, '__class__') and 'ObjectId' in str(type(value)):
-                            msg_data[key] = str(value)
+                    msg_data = {key: str(value) if isinstance(value, ObjectId) else value
+                                for key, value in msg_data.items()}
                     
                     message_obj = Message.from_dict(msg_data)
                     message_objects.append(message_obj.to_dict())
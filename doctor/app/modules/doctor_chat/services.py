@@ -5,6 +5,7 @@ Service layer for processing doctor chat requests
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import logging
+from bson import ObjectId
 
 from app.modules.doctor_chat.models import Message, ChatRoom, MessageAttachment
 from app.modules.doctor_chat.repository import get_doctor_chat_repository
@@ -1043,7 +1044,7 @@ class DoctorChatService:
                     return {key: clean_mongo_data(value) for key, value in data.items()}
                 elif isinstance(data, list):
                     return [clean_mongo_data(item) for item in data]
-                elif hasattr(data, '__class__') and 'ObjectId' in str(data.__class__):
+                elif isinstance(data, ObjectId):
                     return str(data)
                 elif hasattr(data, 'isoformat'):  # datetime objects
                     return data.isoformat()
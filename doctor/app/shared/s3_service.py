@@ -11,6 +11,7 @@ import mimetypes
 
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import ClientError, NoCredentialsError
     BOTO3_AVAILABLE = True
 except ImportError:
@@ -34,6 +35,10 @@ from app.core.config import (
 
 logger = logging.getLogger(__name__)
 
+# Keep TLS connections to S3 alive and pooled across concurrent uploads
+_S3_MAX_POOL_CONNECTIONS = 50
+_S3_MAX_ATTEMPTS = 2
+
 
 class S3Service:
     """Service for handling file uploads to AWS S3"""
@@ -63,7 +68,12 @@ class S3Service:
                 's3',
                 aws_access_key_id=AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-                region_name=AWS_REGION
+                region_name=AWS_REGION,
+                config=Config(
+                    max_pool_connections=_S3_MAX_POOL_CONNECTIONS,
+                    retries={'max_attempts': _S3_MAX_ATTEMPTS, 'mode': 'standard'},
+                    tcp_keepalive=True
+                )
             )
             
             # Don't verify bucket on startup - do it lazily
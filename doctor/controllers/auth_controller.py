@@ -78,27 +78,17 @@ class AuthController:
                     "error": f"Failed to generate OTP: {str(e)}"
                 }), 500
             
-            # Send OTP email
-            email_result = self.email_service.send_otp_email(email, otp)
+            # Send OTP email in the background; the response is the same
+            # whether or not delivery succeeds (failures are logged by the sender)
+            self.email_service.send_otp_email_async(email, otp)
             
             # Return the EXACT format you requested
-            if email_result['success']:
-                print(f"✅ OTP sent successfully to: {email}")
-                return jsonify({
-                    "email": email,
-                    "message": "Please check your email for OTP verification.",
-                    "signup_token": jwt_token,
-                    "status": "otp_sent"
-                }), 200
-            else:
-                # Email failed but OTP is available - return OTP anyway
-                print(f"⚠️ Email sending failed, but OTP is available: {otp}")
-                return jsonify({
-                    "email": email,
-                    "message": "Please check your email for OTP verification.",
-                    "signup_token": jwt_token,
-                    "status": "otp_sent"
-                }), 200
+            return jsonify({
+                "email": email,
+                "message": "Please check your email for OTP verification.",
+                "signup_token": jwt_token,
+                "status": "otp_sent"
+            }), 200
                 
         except Exception as e:
             return jsonify({'error': f'Server error: {str(e)}'}), 500
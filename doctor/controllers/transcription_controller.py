@@ -232,6 +232,7 @@ class TranscriptionController:
             page = int(request.args.get('page', 1))
             limit = int(request.args.get('limit', 50))
             is_final = request.args.get('is_final', '')
+            after = request.args.get('after')
             
             # Build filters
             filters = {"conversation_id": int(conversation_id)}
@@ -243,9 +244,13 @@ class TranscriptionController:
                 conversation_id,
                 page=page,
                 limit=limit,
-                filters=filters
+                filters=filters,
+                after=after
             )
             
+            # Cursor for the next page, only when this page came back full
+            next_cursor = self.transcription_model.get_next_cursor(transcriptions, limit)
+            
             return jsonify({
                 "success": True,
                 "data": {
@@ -253,7 +258,8 @@ class TranscriptionController:
                     "transcriptions": transcriptions,
                     "pagination": {
                         "page": page,
-                        "limit": limit
+                        "limit": limit,
+                        "next_cursor": next_cursor
                     }
                 },
                 "message": "Conversation transcriptions retrieved successfully"
@@ -271,6 +277,7 @@ class TranscriptionController:
             # Get query parameters
             page = int(request.args.get('page', 1))
             limit = int(request.args.get('limit', 50))
+            after = request.args.get('after')
             
             # Build filters for final transcriptions only
             filters = {
@@ -283,9 +290,13 @@ class TranscriptionController:
                 conversation_id,
                 page=page,
                 limit=limit,
-                filters=filters
+                filters=filters,
+                after=after
             )
             
+            # Cursor for the next page, only when this page came back full
+            next_cursor = self.transcription_model.get_next_cursor(transcriptions, limit)
+            
             return jsonify({
                 "success": True,
                 "data": {
@@ -293,7 +304,8 @@ class TranscriptionController:
                     "transcriptions": transcriptions,
                     "pagination": {
                         "page": page,
-                        "limit": limit
+                        "limit": limit,
+                        "next_cursor": next_cursor
                     }
                 },
                 "message": "Final transcriptions retrieved successfully"
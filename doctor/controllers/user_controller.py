@@ -155,6 +155,8 @@ class UserController:
         try:
             # Get query parameters
             search_query = request.args.get('search', '').strip()
+            page = request.args.get('page', type=int)
+            limit = request.args.get('limit', type=int)
             
             # Role-based access control
             current_role = current_user.get('role')
@@ -178,16 +180,19 @@ class UserController:
                 pass
             
             # Get users
-            result = self.user_model.list_users(search_query, role_filter)
+            result = self.user_model.list_users(search_query, role_filter, page=page, limit=limit)
             
             if result['success']:
-                return jsonify({
+                response = {
                     'success': True,
                     'users': result['users'],
                     'total_count': result['total_count'],
                     'search_query': search_query,
                     'role_filter': role_filter
-                }), 200
+                }
+                if limit:
+                    response['pagination'] = {'page': page or 1, 'limit': limit}
+                return jsonify(response), 200
             else:
                 return jsonify({'error': result['error']}), 500
                 
@@ -12,8 +12,8 @@ from datetime import datetime
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from services.medical_knowledge_base import MedicalKnowledgeBase
-from services.vector_database import VectorDatabase
+from services.medical_knowledge_base import get_knowledge_base
+from services.vector_database import get_vector_db
 from services.rag_medical_service import RAGMedicalService
 
 def setup_logging():
@@ -33,13 +33,13 @@ def initialize_rag_system():
         
         # Initialize medical knowledge base
         logger.info("Initializing medical knowledge base...")
-        knowledge_base = MedicalKnowledgeBase()
+        knowledge_base = get_knowledge_base()
         knowledge_stats = knowledge_base.get_stats()
         logger.info(f"Medical knowledge base initialized: {knowledge_stats}")
         
         # Initialize vector database
         logger.info("Initializing vector database...")
-        vector_db = VectorDatabase()
+        vector_db = get_vector_db()
         vector_stats = vector_db.get_stats()
         logger.info(f"Vector database initialized: {vector_stats}")
         
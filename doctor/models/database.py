@@ -5,8 +5,52 @@ Database Model - Handles all database operations
 import pymongo
 from pymongo import MongoClient
 import os
+import atexit
+import threading
 from datetime import datetime, timedelta
 import logging
+from utils.mongo_uri import resolve_srv_uri
+
+# Skip the SRV/TXT lookups on cold start by connecting through a cached seed list
+_PRERESOLVE_SRV = os.getenv('MONGO_PRERESOLVE_SRV', 'false').lower() == 'true'
+
+# One MongoClient per URI for the whole process; every model and controller
+# creates its own Database, and a client per instance repeats the SRV/TLS handshake
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def _get_shared_client(mongodb_uri):
+    """Return the process-wide MongoClient for a URI, creating it on first use"""
+    with _shared_clients_lock:
+        client = _shared_clients.get(mongodb_uri)
+        if client is None:
+            # Suppress background periodic task errors by adjusting timeouts and pool settings
+            client = MongoClient(
+                resolve_srv_uri(mongodb_uri) if _PRERESOLVE_SRV else mongodb_uri, 
+                serverSelectionTimeoutMS=60000,  # 60 seconds
+                connectTimeoutMS=60000,          # 60 seconds
+                socketTimeoutMS=60000,           # 60 seconds
+                retryWrites=True,
+                retryReads=True,
+                maxPoolSize=50,                  # Shared by every Database instance
+                minPoolSize=1,
+                heartbeatFrequencyMS=30000,     # Send heartbeats every 30 seconds (less frequent)
+                maxIdleTimeMS=300000,           # Close connections after 5 minutes idle
+                waitQueueTimeoutMS=60000       # Wait up to 60s for connection from pool
+            )
+            _shared_clients[mongodb_uri] = client
+        return client
+
+
+@atexit.register
+def _close_shared_clients():
+    """Close every shared MongoClient at process shutdown"""
+    with _shared_clients_lock:
+        for client in _shared_clients.values():
+            client.close()
+        _shared_clients.clear()
+
 
 class Database:
     """Database connection and operations"""
@@ -33,21 +77,8 @@ class Database:
                 print(f"[INFO] Database: {database_name}")
                 print(f"[INFO] Environment: {'Production' if 'render' in str(mongodb_uri).lower() else 'Development'}")
                 
-                # Create MongoDB client with better connection parameters
-                # Suppress background periodic task errors by adjusting timeouts and pool settings
-                self.client = MongoClient(
-                    mongodb_uri, 
-                    serverSelectionTimeoutMS=60000,  # 60 seconds
-                    connectTimeoutMS=60000,          # 60 seconds
-                    socketTimeoutMS=60000,           # 60 seconds
-                    retryWrites=True,
-                    retryReads=True,
-                    maxPoolSize=10,
-                    minPoolSize=1,
-                    heartbeatFrequencyMS=30000,     # Send heartbeats every 30 seconds (less frequent)
-                    maxIdleTimeMS=300000,           # Close connections after 5 minutes idle
-                    waitQueueTimeoutMS=60000       # Wait up to 60s for connection from pool
-                )
+                # Reuse the process-wide client so its pool and SRV lookup are shared
+                self.client = _get_shared_client(mongodb_uri)
                 
                 # Suppress background periodic task errors
                 pymongo_logger = logging.getLogger('pymongo')
@@ -215,7 +246,9 @@ class Database:
     def disconnect(self):
         """Disconnect from MongoDB"""
         if self.client:
-            self.client.close()
+            # The client is shared with every other Database; it is closed at exit
+            self.client = None
+            self.db = None
             self.is_connected = False
             print("[SUCCESS] Disconnected from MongoDB")
     
@@ -50,10 +50,12 @@ class DoctorModel:
             import random
             doctor_id = f"D{int(time.time() * 1000)}{random.randint(1000, 9999)}"
             
-            # Hash password
-            password = doctor_data.get('password', '')
-            salt = bcrypt.gensalt()
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), salt)
+            # Hash password, unless the caller already supplies a bcrypt hash
+            password_hash = doctor_data.get('password_hash')
+            if not password_hash:
+                password = doctor_data.get('password', '')
+                salt = bcrypt.gensalt()
+                password_hash = bcrypt.hashpw(password.encode('utf-8'), salt)
             
             # Create doctor document
             doctor_doc = {
@@ -6,6 +6,40 @@ Transcription Model - Database operations for transcription management
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+# Default values for the caller-supplied fields of a transcription document
+_TRANSCRIPTION_DEFAULTS = {
+    "text": "",
+    "confidence": 0.0,
+    "is_final": False,
+    "start_time": 0.0,
+    "end_time": 0.0,
+    "language": "en",
+    "speaker_id": "unknown"
+}
+
+# Joins created_at and transcription_id in a keyset pagination cursor
+_CURSOR_SEPARATOR = "|"
+
+
+def _transcription_to_dict(transcription: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a transcription document to its API representation"""
+    transcription_id = transcription['transcription_id']
+    return {
+        'id': transcription_id,
+        'transcription_id': transcription_id,
+        'conversation_id': transcription['conversation_id'],
+        'text': transcription['text'],
+        'confidence': transcription['confidence'],
+        'is_final': transcription['is_final'],
+        'start_time': transcription['start_time'],
+        'end_time': transcription['end_time'],
+        'language': transcription['language'],
+        'speaker_id': transcription['speaker_id'],
+        'created_at': transcription['created_at'],
+        'updated_at': transcription['updated_at']
+    }
+
+
 class TranscriptionModel:
     """Model for transcription-related database operations"""
     
@@ -32,6 +66,7 @@ class TranscriptionModel:
             self.transcriptions_collection.create_index("language")
             self.transcriptions_collection.create_index("speaker_id")
             self.transcriptions_collection.create_index("created_at")
+            self.transcriptions_collection.create_index([("conversation_id", 1), ("created_at", 1), ("transcription_id", 1)])
         except Exception as e:
             error_msg = str(e)
             if 'IndexKeySpecsConflict' in error_msg or 'already exists' in error_msg.lower():
@@ -42,27 +77,29 @@ class TranscriptionModel:
     def create_transcription(self, transcription_data: Dict[str, Any]) -> str:
         """Create a new transcription"""
         try:
+            now = datetime.now()
+            created_at = transcription_data.get("created_at", now.isoformat())
+            
             # Generate transcription ID
-            transcription_id = int(datetime.now().timestamp() * 1000)
+            transcription_id = int(now.timestamp() * 1000)
             
             # Prepare transcription document
-            transcription_doc = {
-                "transcription_id": transcription_id,
-                "conversation_id": transcription_data.get("conversation_id"),
-                "text": transcription_data.get("text", ""),
-                "confidence": transcription_data.get("confidence", 0.0),
-                "is_final": transcription_data.get("is_final", False),
-                "start_time": transcription_data.get("start_time", 0.0),
-                "end_time": transcription_data.get("end_time", 0.0),
-                "language": transcription_data.get("language", "en"),
-                "speaker_id": transcription_data.get("speaker_id", "unknown"),
-                "created_at": transcription_data.get("created_at", datetime.now().isoformat()),
-                "updated_at": transcription_data.get("created_at", datetime.now().isoformat())
-            }
+            transcription_doc = dict(_TRANSCRIPTION_DEFAULTS)
+            for field in _TRANSCRIPTION_DEFAULTS:
+                if field in transcription_data:
+                    transcription_doc[field] = transcription_data[field]
+            transcription_doc.update(
+                transcription_id=transcription_id,
+                conversation_id=transcription_data.get("conversation_id"),
+                created_at=created_at,
+                updated_at=created_at
+            )
             
             # Insert transcription
             result = self.transcriptions_collection.insert_one(transcription_doc)
             
+            self._increment_conversation_transcription_count(transcription_doc["conversation_id"], 1)
+            
             return transcription_id
             
         except Exception as e:
@@ -77,20 +114,7 @@ class TranscriptionModel:
             if not transcription:
                 return None
             
-            return {
-                'id': transcription_id,
-                'transcription_id': transcription['transcription_id'],
-                'conversation_id': transcription['conversation_id'],
-                'text': transcription['text'],
-                'confidence': transcription['confidence'],
-                'is_final': transcription['is_final'],
-                'start_time': transcription['start_time'],
-                'end_time': transcription['end_time'],
-                'language': transcription['language'],
-                'speaker_id': transcription['speaker_id'],
-                'created_at': transcription['created_at'],
-                'updated_at': transcription['updated_at']
-            }
+            return _transcription_to_dict(transcription)
             
         except Exception as e:
             print(f"Error getting transcription: {e}")
@@ -106,26 +130,9 @@ class TranscriptionModel:
             skip = (page - 1) * limit
             
             # Find transcriptions
-            cursor = self.transcriptions_collection.find(filters).skip(skip).limit(limit).sort("created_at", -1)
-            transcriptions = []
-            
-            for transcription in cursor:
-                transcriptions.append({
-                    'id': transcription['transcription_id'],
-                    'transcription_id': transcription['transcription_id'],
-                    'conversation_id': transcription['conversation_id'],
-                    'text': transcription['text'],
-                    'confidence': transcription['confidence'],
-                    'is_final': transcription['is_final'],
-                    'start_time': transcription['start_time'],
-                    'end_time': transcription['end_time'],
-                    'language': transcription['language'],
-                    'speaker_id': transcription['speaker_id'],
-                    'created_at': transcription['created_at'],
-                    'updated_at': transcription['updated_at']
-                })
-            
-            return transcriptions
+            # Match the driver batch to the page so a page is fetched in one round trip
+            cursor = self.transcriptions_collection.find(filters).skip(skip).limit(limit).sort("created_at", -1).batch_size(max(limit, 0))
+            return [_transcription_to_dict(transcription) for transcription in cursor]
             
         except Exception as e:
             print(f"Error getting transcriptions: {e}")
@@ -153,8 +160,16 @@ class TranscriptionModel:
     def delete_transcription(self, transcription_id: int) -> bool:
         """Delete transcription"""
         try:
-            result = self.transcriptions_collection.delete_one({"transcription_id": transcription_id})
-            return result.deleted_count > 0
+            deleted = self.transcriptions_collection.find_one_and_delete(
+                {"transcription_id": transcription_id},
+                projection={"conversation_id": 1}
+            )
+            
+            if not deleted:
+                return False
+            
+            self._increment_conversation_transcription_count(deleted.get("conversation_id"), -1)
+            return True
             
         except Exception as e:
             print(f"Error deleting transcription: {e}")
@@ -172,8 +187,12 @@ class TranscriptionModel:
             print(f"Error counting transcriptions: {e}")
             return 0
     
-    def get_transcriptions_by_conversation(self, conversation_id: int, page: int = 1, limit: int = 50, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Get transcriptions for a specific conversation"""
+    def get_transcriptions_by_conversation(self, conversation_id: int, page: int = 1, limit: int = 50, filters: Dict[str, Any] = None, after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get transcriptions for a specific conversation
+        
+        When ``after`` (the ``next_cursor`` of the previous page) is given, the
+        page is read as a range on the index and ``page`` is ignored.
+        """
         try:
             if filters is None:
                 filters = {}
@@ -181,36 +200,45 @@ class TranscriptionModel:
             # Add conversation_id to filters
             filters["conversation_id"] = conversation_id
             
-            # Calculate skip
-            skip = (page - 1) * limit
+            if after:
+                # Keyset pagination: start right after the last seen (created_at, transcription_id);
+                # created_at alone is not unique, so ties are broken on the id
+                after_created_at, _, after_id = after.rpartition(_CURSOR_SEPARATOR)
+                if after_created_at and after_id.isdigit():
+                    filters["$or"] = [
+                        {"created_at": {"$gt": after_created_at}},
+                        {"created_at": after_created_at, "transcription_id": {"$gt": int(after_id)}}
+                    ]
+                else:
+                    filters["created_at"] = {"$gt": after}
+                skip = 0
+            else:
+                # Calculate skip
+                skip = (page - 1) * limit
             
             # Find transcriptions
-            cursor = self.transcriptions_collection.find(filters).skip(skip).limit(limit).sort("created_at", 1)
-            transcriptions = []
-            
-            for transcription in cursor:
-                transcriptions.append({
-                    'id': transcription['transcription_id'],
-                    'transcription_id': transcription['transcription_id'],
-                    'conversation_id': transcription['conversation_id'],
-                    'text': transcription['text'],
-                    'confidence': transcription['confidence'],
-                    'is_final': transcription['is_final'],
-                    'start_time': transcription['start_time'],
-                    'end_time': transcription['end_time'],
-                    'language': transcription['language'],
-                    'speaker_id': transcription['speaker_id'],
-                    'created_at': transcription['created_at'],
-                    'updated_at': transcription['updated_at']
-                })
-            
-            return transcriptions
+            cursor = (
+                self.transcriptions_collection.find(filters)
+                .sort([("created_at", 1), ("transcription_id", 1)])
+                .skip(skip)
+                .limit(limit)
+                .batch_size(max(limit, 0))
+                .hint([("conversation_id", 1), ("created_at", 1), ("transcription_id", 1)])
+            )
+            return [_transcription_to_dict(transcription) for transcription in cursor]
             
         except Exception as e:
             print(f"Error getting transcriptions by conversation: {e}")
             return []
     
-    def get_final_transcriptions_by_conversation(self, conversation_id: int, page: int = 1, limit: int = 50) -> List[Dict[str, Any]]:
+    def get_next_cursor(self, transcriptions: List[Dict[str, Any]], limit: int) -> Optional[str]:
+        """Cursor for the page after these transcriptions, only when the page came back full"""
+        if not transcriptions or len(transcriptions) != limit:
+            return None
+        last = transcriptions[-1]
+        return f"{last['created_at']}{_CURSOR_SEPARATOR}{last['transcription_id']}"
+    
+    def get_final_transcriptions_by_conversation(self, conversation_id: int, page: int = 1, limit: int = 50, after: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get only final transcriptions for a conversation"""
         try:
             filters = {
@@ -218,14 +246,33 @@ class TranscriptionModel:
                 "is_final": True
             }
             
-            return self.get_transcriptions_by_conversation(conversation_id, page, limit, filters)
+            return self.get_transcriptions_by_conversation(conversation_id, page, limit, filters, after=after)
             
         except Exception as e:
             print(f"Error getting final transcriptions: {e}")
             return []
     
+    def _increment_conversation_transcription_count(self, conversation_id: int, delta: int) -> None:
+        """Adjust a conversation's transcription count in place"""
+        if conversation_id is None:
+            return
+        try:
+            self.db.db.conversations.update_one(
+                {"conversation_id": conversation_id},
+                {
+                    "$inc": {"transcription_count": delta},
+                    "$set": {"updated_at": datetime.now().isoformat()}
+                }
+            )
+        except Exception as e:
+            print(f"Error updating conversation transcription count: {e}")
+    
     def update_conversation_transcription_count(self, conversation_id: int) -> bool:
-        """Update transcription count for a conversation"""
+        """Recount transcriptions for a conversation
+        
+        Counts are kept current on create/delete; this full recount is only
+        needed to repair a conversation whose count has drifted.
+        """
         try:
             # Count transcriptions for this conversation
             count = self.transcriptions_collection.count_documents({"conversation_id": conversation_id})
@@ -3,11 +3,13 @@ User Model - Handles user operations with MongoDB
 """
 
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 import hashlib
 import secrets
 import string
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from models.database import Database
 
 
@@ -25,10 +27,22 @@ class UserModel:
         is_connected = getattr(self.db, 'is_connected', False)
         if self.db is not None and self.db.db is not None and is_connected:
             self.users_collection = self.db.db.users
+            self._create_indexes()
         else:
             self.users_collection = None
             print("⚠️ Warning: Database not connected. UserModel operating in fallback mode.")
     
+    def _create_indexes(self):
+        """Create database indexes for users collection"""
+        # update_user relies on this index to reject duplicate emails, so failing to
+        # build it (e.g. duplicates already stored) is an error, not a warning
+        try:
+            self.users_collection.create_index("email", unique=True)
+        except OperationFailure as e:
+            existing = self.users_collection.index_information().get('email_1', {})
+            if not existing.get('unique'):
+                raise RuntimeError(f"Unique index on users.email could not be created: {e}") from e
+    
     def _hash_password(self, password: str) -> str:
         """Hash password using SHA-256"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -56,6 +70,9 @@ class UserModel:
     
     def create_user(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user"""
+        if self.users_collection is None:
+            return {'success': False, 'error': 'Database not connected'}
+        
         try:
             # Validate required fields
             required_fields = ['name', 'email', 'password', 'role']
@@ -105,6 +122,9 @@ class UserModel:
     
     def find_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Find user by email"""
+        if self.users_collection is None:
+            return None
+        
         try:
             user_doc = self.users_collection.find_one({'email': email.strip().lower()})
             return self._convert_to_dict(user_doc) if user_doc else None
@@ -114,6 +134,9 @@ class UserModel:
     
     def find_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Find user by ID"""
+        if self.users_collection is None:
+            return None
+        
         try:
             if not ObjectId.is_valid(user_id):
                 return None
@@ -126,15 +149,13 @@ class UserModel:
     
     def update_user(self, user_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Update user information"""
+        if self.users_collection is None:
+            return {'success': False, 'error': 'Database not connected'}
+        
         try:
             if not ObjectId.is_valid(user_id):
                 return {'success': False, 'error': 'Invalid user ID'}
             
-            # Check if user exists
-            existing_user = self.find_by_id(user_id)
-            if not existing_user:
-                return {'success': False, 'error': 'User not found'}
-            
             # Prepare update data
             update_data = {}
             allowed_fields = ['name', 'email', 'avatar']
@@ -142,10 +163,6 @@ class UserModel:
             for field in allowed_fields:
                 if field in data and data[field] is not None:
                     if field == 'email':
-                        # Check if email is already taken by another user
-                        existing_email_user = self.find_by_email(data[field])
-                        if existing_email_user and existing_email_user['user_id'] != user_id:
-                            return {'success': False, 'error': 'Email already exists'}
                         update_data[field] = data[field].strip().lower()
                     else:
                         update_data[field] = data[field].strip() if isinstance(data[field], str) else data[field]
@@ -157,28 +174,34 @@ class UserModel:
             if not update_data:
                 return {'success': False, 'error': 'No valid fields to update'}
             
-            # Update in database
-            result = self.users_collection.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$set': update_data}
-            )
+            # Update and read back in one round trip; the unique email index
+            # (enforced by _create_indexes) reports a taken email as DuplicateKeyError
+            try:
+                updated_doc = self.users_collection.find_one_and_update(
+                    {'_id': ObjectId(user_id)},
+                    {'$set': update_data},
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                return {'success': False, 'error': 'Email already exists'}
             
-            if result.modified_count > 0:
-                # Get updated user
-                updated_user = self.find_by_id(user_id)
-                return {
-                    'success': True,
-                    'user': updated_user,
-                    'message': 'User updated successfully'
-                }
-            else:
-                return {'success': False, 'error': 'No changes made'}
+            if not updated_doc:
+                return {'success': False, 'error': 'User not found'}
+            
+            return {
+                'success': True,
+                'user': self._convert_to_dict(updated_doc),
+                'message': 'User updated successfully'
+            }
                 
         except Exception as e:
             return {'success': False, 'error': f'Database error: {str(e)}'}
     
     def delete_user(self, user_id: str) -> Dict[str, Any]:
         """Delete user (soft delete by setting is_active to False)"""
+        if self.users_collection is None:
+            return {'success': False, 'error': 'Database not connected'}
+        
         try:
             if not ObjectId.is_valid(user_id):
                 return {'success': False, 'error': 'Invalid user ID'}
@@ -205,32 +228,58 @@ class UserModel:
         except Exception as e:
             return {'success': False, 'error': f'Database error: {str(e)}'}
     
-    def list_users(self, search_query: str = None, role_filter: str = None) -> Dict[str, Any]:
-        """List users with optional search and role filtering"""
-        try:
-            # Build query filter
-            query_filter = {'is_active': True}
-            
-            if role_filter:
+    def _build_list_filter(self, search_query: str = None, role_filter=None) -> Dict[str, Any]:
+        """Build the users query for list/iterate calls"""
+        query_filter = {'is_active': True}
+        
+        if role_filter:
+            if isinstance(role_filter, (list, tuple, set)):
+                query_filter['role'] = {'$in': list(role_filter)}
+            else:
                 query_filter['role'] = role_filter
-            
-            if search_query:
-                query_filter['$or'] = [
-                    {'name': {'$regex': search_query, '$options': 'i'}},
-                    {'email': {'$regex': search_query, '$options': 'i'}}
-                ]
-            
-            # Find users
-            users_cursor = self.users_collection.find(query_filter)
-            users = []
-            
-            for user_doc in users_cursor:
-                users.append(self._convert_to_dict(user_doc))
+        
+        if search_query:
+            # Case-insensitive substring match; $text would only match whole stemmed words
+            query_filter['$or'] = [
+                {'name': {'$regex': search_query, '$options': 'i'}},
+                {'email': {'$regex': search_query, '$options': 'i'}}
+            ]
+        
+        return query_filter
+    
+    def iter_users(self, search_query: str = None, role_filter=None, skip: int = 0, limit: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield users one at a time straight from the cursor"""
+        if self.users_collection is None:
+            return
+        
+        query_filter = self._build_list_filter(search_query, role_filter)
+        users_cursor = self.users_collection.find(query_filter).skip(skip).limit(limit)
+        if limit:
+            users_cursor = users_cursor.batch_size(max(limit, 0))
+        
+        for user_doc in users_cursor:
+            yield self._convert_to_dict(user_doc)
+    
+    def list_users(self, search_query: str = None, role_filter=None, page: int = None, limit: int = None) -> Dict[str, Any]:
+        """List users with optional search, role filtering and pagination"""
+        if self.users_collection is None:
+            return {'success': False, 'error': 'Database not connected'}
+        
+        try:
+            if limit:
+                page = max(page or 1, 1)
+                users = list(self.iter_users(search_query, role_filter, skip=(page - 1) * limit, limit=limit))
+                total_count = self.users_collection.count_documents(
+                    self._build_list_filter(search_query, role_filter)
+                )
+            else:
+                users = list(self.iter_users(search_query, role_filter))
+                total_count = len(users)
             
             return {
                 'success': True,
                 'users': users,
-                'total_count': len(users)
+                'total_count': total_count
             }
             
         except Exception as e:
@@ -238,6 +287,9 @@ class UserModel:
     
     def reset_password(self, user_id: str, new_password: str = None) -> Dict[str, Any]:
         """Reset user password"""
+        if self.users_collection is None:
+            return {'success': False, 'error': 'Database not connected'}
+        
         try:
             if not ObjectId.is_valid(user_id):
                 return {'success': False, 'error': 'Invalid user ID'}
@@ -274,6 +326,9 @@ class UserModel:
     
     def verify_password(self, email: str, password: str) -> bool:
         """Verify user password"""
+        if self.users_collection is None:
+            return False
+        
         try:
             user = self.find_by_email(email)
             if not user:
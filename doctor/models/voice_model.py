@@ -8,6 +8,29 @@ from typing import Dict, Any, List, Optional
 import hashlib
 import secrets
 
+# Default values for the caller-supplied fields of a voice user document
+_VOICE_USER_DEFAULTS = {
+    "email": None,
+    "username": "",
+    "password_hash": "",
+    "role": "voice_user"
+}
+
+
+def _voice_user_to_dict(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a voice user document to its API representation"""
+    return {
+        'id': str(user['_id']),
+        'user_id': user['user_id'],
+        'email': user['email'],
+        'username': user.get('username', ''),
+        'role': user.get('role', 'voice_user'),
+        'is_active': user.get('is_active', True),
+        'created_at': user.get('created_at', ''),
+        'updated_at': user.get('updated_at', '')
+    }
+
+
 class VoiceModel:
     """Model for voice-related database operations"""
     
@@ -69,20 +92,23 @@ class VoiceModel:
     def create_user(self, user_data: Dict[str, Any]) -> str:
         """Create a new voice user"""
         try:
+            now = datetime.now()
+            timestamp = now.isoformat()
+            
             # Generate user ID
-            user_id = f"voice_{int(datetime.now().timestamp() * 1000)}"
+            user_id = f"voice_{int(now.timestamp() * 1000)}"
             
             # Prepare user document
-            user_doc = {
-                "user_id": user_id,
-                "email": user_data.get("email"),
-                "username": user_data.get("username", ""),
-                "password_hash": user_data.get("password_hash", ""),
-                "role": user_data.get("role", "voice_user"),
-                "is_active": True,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }
+            user_doc = dict(_VOICE_USER_DEFAULTS)
+            for field in _VOICE_USER_DEFAULTS:
+                if field in user_data:
+                    user_doc[field] = user_data[field]
+            user_doc.update(
+                user_id=user_id,
+                is_active=True,
+                created_at=timestamp,
+                updated_at=timestamp
+            )
             
             # Insert user
             result = self.voice_collection.insert_one(user_doc)
@@ -101,16 +127,7 @@ class VoiceModel:
             if not user:
                 return None
             
-            return {
-                'id': str(user['_id']),
-                'user_id': user['user_id'],
-                'email': user['email'],
-                'username': user.get('username', ''),
-                'role': user.get('role', 'voice_user'),
-                'is_active': user.get('is_active', True),
-                'created_at': user.get('created_at', ''),
-                'updated_at': user.get('updated_at', '')
-            }
+            return _voice_user_to_dict(user)
             
         except Exception as e:
             print(f"Error getting user: {e}")
@@ -155,22 +172,8 @@ class VoiceModel:
             skip = (page - 1) * limit
             
             # Find users
-            cursor = self.voice_collection.find(filters).skip(skip).limit(limit)
-            users = []
-            
-            for user in cursor:
-                users.append({
-                    'id': str(user['_id']),
-                    'user_id': user['user_id'],
-                    'email': user['email'],
-                    'username': user.get('username', ''),
-                    'role': user.get('role', 'voice_user'),
-                    'is_active': user.get('is_active', True),
-                    'created_at': user.get('created_at', ''),
-                    'updated_at': user.get('updated_at', '')
-                })
-            
-            return users
+            cursor = self.voice_collection.find(filters).skip(skip).limit(limit).batch_size(max(limit, 0))
+            return [_voice_user_to_dict(user) for user in cursor]
             
         except Exception as e:
             print(f"Error getting users: {e}")
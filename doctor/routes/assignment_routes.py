@@ -12,6 +12,13 @@ assignment_bp = Blueprint('assignments', __name__, url_prefix='/api/assignments'
 # Initialize controller
 assignment_controller = AssignmentController()
 
+# Controller handlers, bound once at import
+_list_assignments = assignment_controller.list_assignments
+_create_assignment = assignment_controller.create_assignment
+_end_assignment = assignment_controller.end_assignment
+_get_nurse_patients = assignment_controller.get_nurse_patients
+_get_patient_nurse = assignment_controller.get_patient_nurse
+
 
 @assignment_bp.route('', methods=['GET'])
 @require_auth
@@ -22,7 +29,7 @@ def list_assignments(current_user):
     Doctor: Can see all assignments
     Nurse: Can only see their own assignments
     """
-    return assignment_controller.list_assignments(request, current_user)
+    return _list_assignments(request, current_user)
 
 
 @assignment_bp.route('', methods=['POST'])
@@ -33,7 +40,7 @@ def create_assignment(current_user):
     Admin: Can assign any nurse to any patient
     Doctor: Can assign nurses to patients
     """
-    return assignment_controller.create_assignment(request, current_user)
+    return _create_assignment(request, current_user)
 
 
 @assignment_bp.route('/<assignment_id>', methods=['DELETE'])
@@ -44,7 +51,7 @@ def end_assignment(assignment_id, current_user):
     Admin: Can end any assignment
     Doctor: Can end any assignment
     """
-    return assignment_controller.end_assignment(request, assignment_id, current_user)
+    return _end_assignment(request, assignment_id, current_user)
 
 
 @assignment_bp.route('/nurse/<nurse_id>/patients', methods=['GET'])
@@ -56,7 +63,7 @@ def get_nurse_patients(nurse_id, current_user):
     Doctor: Can view any nurse's patients
     Nurse: Can only view their own patients
     """
-    return assignment_controller.get_nurse_patients(request, nurse_id, current_user)
+    return _get_nurse_patients(request, nurse_id, current_user)
 
 
 @assignment_bp.route('/patient/<patient_id>/nurse', methods=['GET'])
@@ -69,4 +76,4 @@ def get_patient_nurse(patient_id, current_user):
     Nurse: Can only view if patient is assigned to them
     Patient: Can only view their own assigned nurse
     """
-    return assignment_controller.get_patient_nurse(request, patient_id, current_user)
\ No newline at end of file
+    return _get_patient_nurse(request, patient_id, current_user)
\ No newline at end of file
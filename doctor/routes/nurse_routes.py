@@ -12,13 +12,18 @@ nurse_bp = Blueprint('nurses', __name__, url_prefix='/api/nurses')
 # Initialize controller
 nurse_controller = NurseController()
 
+# Controller handlers, bound once at import
+_create_nurse = nurse_controller.create_nurse
+_get_nurses = nurse_controller.get_nurses
+_reset_nurse_password = nurse_controller.reset_nurse_password
+
 
 @nurse_bp.route('', methods=['POST'])
 @require_auth
 @require_roles('doctor')
 def create_nurse(current_user):
     """Create new nurse - Doctor only"""
-    return nurse_controller.create_nurse(request, current_user)
+    return _create_nurse(request, current_user)
 
 
 @nurse_bp.route('', methods=['GET'])
@@ -26,7 +31,7 @@ def create_nurse(current_user):
 @require_roles('doctor')
 def get_nurses(current_user):
     """Get list of nurses assigned to doctor"""
-    return nurse_controller.get_nurses(request, current_user)
+    return _get_nurses(request, current_user)
 
 
 @nurse_bp.route('/<nurse_id>/reset-password', methods=['POST'])
@@ -34,4 +39,4 @@ def get_nurses(current_user):
 @require_roles('doctor')
 def reset_nurse_password(nurse_id, current_user):
     """Reset nurse password - Doctor only"""
-    return nurse_controller.reset_nurse_password(request, nurse_id, current_user)
\ No newline at end of file
+    return _reset_nurse_password(request, nurse_id, current_user)
\ No newline at end of file
@@ -12,6 +12,15 @@ user_bp = Blueprint('users', __name__, url_prefix='/api/users')
 # Initialize controller
 user_controller = UserController()
 
+# Controller handlers, bound once at import
+_login = user_controller.login
+_get_users = user_controller.get_users
+_create_user = user_controller.create_user
+_get_user_profile = user_controller.get_user_profile
+_update_user = user_controller.update_user
+_delete_user = user_controller.delete_user
+_reset_password = user_controller.reset_password
+
 
 @user_bp.route('/login', methods=['POST'])
 def login():
@@ -19,7 +28,7 @@ def login():
     Returns:
         JWT token on successful authentication
     """
-    return user_controller.login(request)
+    return _login(request)
 
 
 @user_bp.route('', methods=['GET'])
@@ -31,7 +40,7 @@ def get_users(current_user):
     Doctor: Can see nurses and patients
     Nurse: Can only see assigned patients
     """
-    return user_controller.get_users(request, current_user)
+    return _get_users(request, current_user)
 
 
 @user_bp.route('', methods=['POST'])
@@ -42,7 +51,7 @@ def create_user(current_user):
     Admin: Can create any role
     Doctor: Can create only nurses and patients
     """
-    return user_controller.create_user(request, current_user)
+    return _create_user(request, current_user)
 
 
 @user_bp.route('/<user_id>', methods=['GET'])
@@ -54,7 +63,7 @@ def get_user_profile(user_id, current_user):
     Nurse: Can view assigned patients and own profile
     Patient: Can only view own profile
     """
-    return user_controller.get_user_profile(request, user_id, current_user)
+    return _get_user_profile(request, user_id, current_user)
 
 
 @user_bp.route('/<user_id>', methods=['PUT'])
@@ -68,7 +77,7 @@ def update_user(user_id, current_user):
     Patient: Can update only own profile
     Fields editable: name, email, password, avatar
     """
-    return user_controller.update_user(request, user_id, current_user)
+    return _update_user(request, user_id, current_user)
 
 
 @user_bp.route('/<user_id>', methods=['DELETE'])
@@ -79,7 +88,7 @@ def delete_user(user_id, current_user):
     Admin: Can delete any user except self
     Doctor: Can delete only nurses and patients
     """
-    return user_controller.delete_user(request, user_id, current_user)
+    return _delete_user(request, user_id, current_user)
 
 
 @user_bp.route('/<user_id>/reset-password', methods=['PATCH'])
@@ -91,4 +100,4 @@ def reset_password(user_id, current_user):
     Doctor: Can reset password for nurses and patients
     Nurse: Can reset password for assigned patients
     """
-    return user_controller.reset_password(request, user_id, current_user)
+    return _reset_password(request, user_id, current_user)
@@ -5,9 +5,8 @@ Script to create a test doctor account in the database
 
 import os
 import sys
-import hashlib
+import bcrypt
 from datetime import datetime
-from bson import ObjectId
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -26,12 +25,16 @@ def create_test_doctor():
             
         doctor_model = DoctorModel(db)
         
+        # Hash once up front; create_doctor stores a supplied hash as-is
+        password = 'password123'
+        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        
         # Test doctor data
         test_doctor = {
             'username': 'testdoctor',
             'email': 'doctor@test.com',
             'mobile': '1234567890',
-            'password': 'password123',
+            'password_hash': password_hash,
             'role': 'doctor',
             'is_verified': True,  # Skip OTP verification
             'created_at': datetime.now().isoformat()
@@ -43,7 +46,7 @@ def create_test_doctor():
         if result['success']:
             print("✅ Test doctor created successfully")
             print(f"Email: {test_doctor['email']}")
-            print(f"Password: {test_doctor['password']}")
+            print(f"Password: {password}")
             return True
         else:
             print(f"❌ Failed to create test doctor: {result['error']}")
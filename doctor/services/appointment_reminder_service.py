@@ -4,11 +4,40 @@ Appointment Reminder Service - Sends reminder emails for upcoming appointments
 
 import os
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+_REMINDER_SUBJECT_TEMPLATE = "Appointment Reminder - {formatted_date} at {appointment_time}"
+
+_REMINDER_BODY_TEMPLATE = """Hello {patient_name},
+
+This is a reminder for your upcoming appointment:
+
+Date: {formatted_date}
+Time: {appointment_time}
+Type: {appointment_type}
+Doctor: {doctor_name}
+
+Please arrive 10 minutes early for check-in.
+
+If you need to reschedule, please contact us.
+
+Best regards,
+Patient Alert System Team"""
+
+
+@lru_cache(maxsize=128)
+def _format_appointment_date(appointment_date: str) -> str:
+    """Format a YYYY-MM-DD date for display; reminder batches share few dates"""
+    try:
+        date_obj = datetime.strptime(appointment_date, "%Y-%m-%d")
+        return date_obj.strftime("%A, %B %d, %Y")
+    except (TypeError, ValueError):
+        return appointment_date
+
 
 class AppointmentReminderService:
     """Service for sending appointment reminder emails"""
@@ -24,6 +53,18 @@ class AppointmentReminderService:
         self.email_service = email_service
         self.db = db
     
+    def _build_reminder(self, patient_name: str, doctor_name: str, appointment_date: str,
+                        appointment_time: str, appointment_type: str) -> Tuple[str, str]:
+        """Build the reminder email subject and body"""
+        fields = {
+            'patient_name': patient_name,
+            'doctor_name': doctor_name,
+            'formatted_date': _format_appointment_date(appointment_date),
+            'appointment_time': appointment_time,
+            'appointment_type': appointment_type
+        }
+        return _REMINDER_SUBJECT_TEMPLATE.format_map(fields), _REMINDER_BODY_TEMPLATE.format_map(fields)
+    
     def send_appointment_reminder_email(self, patient_email: str, patient_name: str, 
                                        doctor_name: str, appointment_date: str, 
                                        appointment_time: str, appointment_type: str) -> Dict[str, Any]:
@@ -42,32 +83,8 @@ class AppointmentReminderService:
             dict: Result of email sending
         """
         try:
-            # Format date and time
-            try:
-                date_obj = datetime.strptime(appointment_date, "%Y-%m-%d")
-                formatted_date = date_obj.strftime("%A, %B %d, %Y")
-            except:
-                formatted_date = appointment_date
-            
-            # Create email subject
-            subject = f"Appointment Reminder - {formatted_date} at {appointment_time}"
-            
-            # Create email body
-            body = f"""Hello {patient_name},
-
-This is a reminder for your upcoming appointment:
-
-Date: {formatted_date}
-Time: {appointment_time}
-Type: {appointment_type}
-Doctor: {doctor_name}
-
-Please arrive 10 minutes early for check-in.
-
-If you need to reschedule, please contact us.
-
-Best regards,
-Patient Alert System Team"""
+            subject, body = self._build_reminder(patient_name, doctor_name, appointment_date,
+                                                 appointment_time, appointment_type)
             
             # Send email
             result = self.email_service.send_email(
@@ -90,4 +107,46 @@ Patient Alert System Team"""
                 'success': False,
                 'error': str(e)
             }
-
+    
+    def send_appointment_reminder_emails(self, reminders: List[Dict[str, Any]], max_workers: int = 1) -> List[Dict[str, Any]]:
+        """
+        Send reminder emails for several appointments over one SMTP session
+        
+        Args:
+            reminders: List of dicts with the keyword arguments of
+                send_appointment_reminder_email
+            max_workers: SMTP sessions to spread large batches across
+        
+        Returns:
+            list: One result dict per reminder, in the same order
+        """
+        try:
+            emails = []
+            for reminder in reminders:
+                subject, body = self._build_reminder(
+                    reminder['patient_name'],
+                    reminder['doctor_name'],
+                    reminder['appointment_date'],
+                    reminder['appointment_time'],
+                    reminder['appointment_type']
+                )
+                emails.append({
+                    'to_email': reminder['patient_email'],
+                    'subject': subject,
+                    'body': body,
+                    'is_html': False
+                })
+            
+            results = self.email_service.send_bulk_emails(emails, max_workers=max_workers)
+            
+            for reminder, result in zip(reminders, results):
+                if result.get('success'):
+                    logger.info(f"Appointment reminder sent to {reminder['patient_email']}")
+                else:
+                    logger.error(f"Failed to send appointment reminder to {reminder['patient_email']}: {result.get('error')}")
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error sending appointment reminders: {str(e)}")
+            return [{'success': False, 'error': str(e)} for _ in reminders]
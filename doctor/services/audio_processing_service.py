@@ -5,17 +5,35 @@ Audio Processing Service - Handles audio file processing and validation
 
 import os
 import base64
-import tempfile
 import wave
 import struct
+from datetime import datetime
 from typing import Optional, Dict, Any, Tuple, List
 import mimetypes
 
+# WAV "fmt " chunk fields from byte 20: audio format, channels, sample rate,
+# byte rate, block align, bits per sample; data chunk size sits at byte 40
+_WAV_FMT = struct.Struct('<HHIIHH')
+_WAV_DATA_SIZE = struct.Struct('<I')
+
+# Audio formats keyed by their first four bytes; 'wav' and 'm4a' entries
+# still need the rest of the signature checked
+_AUDIO_MAGIC = {
+    b'RIFF': 'wav',
+    b'ftyp': 'm4a',
+    b'OggS': 'ogg',
+    b'fLaC': 'flac'
+}
+
+_SUPPORTED_FORMATS = ('.wav', '.mp3', '.m4a', '.ogg', '.flac')
+_SUPPORTED_SUFFIXES = frozenset(_SUPPORTED_FORMATS)
+_UNSUPPORTED_FORMAT_ERROR = f"Unsupported format. Supported: {', '.join(_SUPPORTED_FORMATS)}"
+
 class AudioProcessingService:
     """Service for audio file processing and validation"""
     
     def __init__(self):
-        self.supported_formats = ['.wav', '.mp3', '.m4a', '.ogg', '.flac']
+        self.supported_formats = list(_SUPPORTED_FORMATS)
         self.max_file_size = 50 * 1024 * 1024  # 50MB
         self.max_duration = 300  # 5 minutes
     
@@ -32,10 +50,10 @@ class AudioProcessingService:
             # Check file extension
             if filename:
                 file_ext = os.path.splitext(filename)[1].lower()
-                if file_ext not in self.supported_formats:
+                if file_ext not in _SUPPORTED_SUFFIXES:
                     return {
                         "valid": False,
-                        "error": f"Unsupported format. Supported: {', '.join(self.supported_formats)}"
+                        "error": _UNSUPPORTED_FORMAT_ERROR
                     }
             
             # Try to detect format from content
@@ -85,30 +103,17 @@ class AudioProcessingService:
                     "error": validation_result["error"]
                 }
             
-            # Save to temporary file for processing
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(audio_bytes)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Process audio
-                processed_data = self._process_audio_file(temp_file_path)
-                
-                return {
-                    "success": True,
-                    "chunk_index": chunk_index,
-                    "is_final": is_final,
-                    "duration": processed_data.get("duration", 0),
-                    "sample_rate": processed_data.get("sample_rate", 0),
-                    "channels": processed_data.get("channels", 0),
-                    "file_size": len(audio_bytes),
-                    "processed_at": self._get_current_timestamp()
-                }
-                
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            # Validation already parsed the header; reuse its audio info
+            return {
+                "success": True,
+                "chunk_index": chunk_index,
+                "is_final": is_final,
+                "duration": validation_result.get("duration", 0),
+                "sample_rate": validation_result.get("sample_rate", 0),
+                "channels": validation_result.get("channels", 0),
+                "file_size": len(audio_bytes),
+                "processed_at": self._get_current_timestamp()
+            }
                     
         except Exception as e:
             return {
@@ -119,24 +124,10 @@ class AudioProcessingService:
     def convert_audio_format(self, input_data: bytes, target_format: str = "wav") -> Optional[bytes]:
         """Convert audio to target format"""
         try:
-            # Save input to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.tmp', delete=False) as temp_file:
-                temp_file.write(input_data)
-                temp_input_path = temp_file.name
-            
-            # Create output file path
-            temp_output_path = temp_input_path + f".{target_format}"
-            
-            try:
-                # For now, just return the original data
-                # In a real implementation, you would use ffmpeg or similar
-                return input_data
-                
-            finally:
-                # Clean up temporary files
-                for path in [temp_input_path, temp_output_path]:
-                    if os.path.exists(path):
-                        os.unlink(path)
+            # For now, just return the original data
+            # In a real implementation, you would use ffmpeg or similar
+            # (write to a temporary file only at that point, if it needs a path)
+            return input_data
                         
         except Exception as e:
             print(f"Error converting audio format: {e}")
@@ -145,19 +136,7 @@ class AudioProcessingService:
     def extract_audio_features(self, audio_data: bytes) -> Dict[str, Any]:
         """Extract features from audio data"""
         try:
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Extract basic features
-                features = self._extract_basic_features(temp_file_path)
-                return features
-                
-            finally:
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            return self._extract_basic_features(audio_data)
                     
         except Exception as e:
             return {"error": str(e)}
@@ -165,17 +144,18 @@ class AudioProcessingService:
     def _detect_audio_format(self, data: bytes) -> Optional[str]:
         """Detect audio format from file data"""
         try:
-            # Check for common audio file signatures
-            if data.startswith(b'RIFF') and b'WAVE' in data[:12]:
-                return 'wav'
-            elif data.startswith(b'ID3') or data.startswith(b'\xff\xfb'):
+            # Look the signature up by its first four bytes
+            detected = _AUDIO_MAGIC.get(bytes(data[:4]))
+            if detected == 'wav':
+                return 'wav' if data[8:12] == b'WAVE' else None
+            if detected == 'm4a':
+                return 'm4a' if data[4:7] == b'M4A' else None
+            if detected:
+                return detected
+            
+            # MP3 signatures are shorter than four bytes
+            if data[:3] == b'ID3' or data[:2] == b'\xff\xfb':
                 return 'mp3'
-            elif data.startswith(b'ftypM4A'):
-                return 'm4a'
-            elif data.startswith(b'OggS'):
-                return 'ogg'
-            elif data.startswith(b'fLaC'):
-                return 'flac'
             
             return None
             
@@ -210,13 +190,12 @@ class AudioProcessingService:
             if len(data) < 44:
                 return {"duration": 0, "sample_rate": 0, "channels": 0}
             
-            # Extract header information
-            sample_rate = struct.unpack('<I', data[24:28])[0]
-            channels = struct.unpack('<H', data[22:24])[0]
-            bits_per_sample = struct.unpack('<H', data[34:36])[0]
+            # Extract header information without slicing the buffer
+            header = memoryview(data)
+            _, channels, sample_rate, _, _, bits_per_sample = _WAV_FMT.unpack_from(header, 20)
             
             # Calculate duration
-            data_size = struct.unpack('<I', data[40:44])[0]
+            data_size = _WAV_DATA_SIZE.unpack_from(header, 40)[0]
             bytes_per_sample = bits_per_sample // 8
             duration = data_size / (sample_rate * channels * bytes_per_sample)
             
@@ -235,40 +214,9 @@ class AudioProcessingService:
                 "error": str(e)
             }
     
-    def _process_audio_file(self, file_path: str) -> Dict[str, Any]:
-        """Process audio file and return metadata"""
-        try:
-            # Get file info
-            file_size = os.path.getsize(file_path)
-            
-            # Try to get audio info
-            with open(file_path, 'rb') as f:
-                data = f.read()
-            
-            audio_info = self._get_audio_info(data, 'wav')
-            
-            return {
-                "file_size": file_size,
-                "duration": audio_info.get("duration", 0),
-                "sample_rate": audio_info.get("sample_rate", 0),
-                "channels": audio_info.get("channels", 0)
-            }
-            
-        except Exception as e:
-            return {
-                "file_size": 0,
-                "duration": 0,
-                "sample_rate": 0,
-                "channels": 0,
-                "error": str(e)
-            }
-    
-    def _extract_basic_features(self, file_path: str) -> Dict[str, Any]:
+    def _extract_basic_features(self, data: bytes) -> Dict[str, Any]:
         """Extract basic audio features"""
         try:
-            with open(file_path, 'rb') as f:
-                data = f.read()
-            
             audio_info = self._get_audio_info(data, 'wav')
             
             return {
@@ -284,7 +232,6 @@ class AudioProcessingService:
     
     def _get_current_timestamp(self) -> str:
         """Get current timestamp in ISO format"""
-        from datetime import datetime
         return datetime.now().isoformat()
     
     def get_supported_formats(self) -> List[str]:
@@ -4,12 +4,33 @@ ElevenLabs Service - Handles ElevenLabs API integration for voice transcription
 """
 
 import os
+import io
 import base64
-import tempfile
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
 import requests
 import json
 
+# How long an is_api_available result is reused before probing again
+_AVAILABILITY_CACHE_SECONDS = 10
+
+# Placeholder text returned when the API cannot transcribe
+_FALLBACK_PHRASES = (
+    "Patient consultation in progress",
+    "Medical examination notes",
+    "Symptom assessment completed",
+    "Treatment plan discussed",
+    "Follow-up scheduled",
+    "Vital signs recorded",
+    "Medication prescribed",
+    "Patient education provided",
+    "Questions answered",
+    "Next appointment confirmed"
+)
+
 class ElevenLabsService:
     """Service for ElevenLabs API integration"""
     
@@ -20,6 +41,16 @@ class ElevenLabsService:
             "xi-api-key": self.api_key,
             "Content-Type": "application/json"
         }
+        # One pooled session so calls reuse the TCP/TLS connection
+        self._session = requests.Session()
+        self._session.headers.update({"xi-api-key": self.api_key})
+        # Bounds how many transcriptions transcribe_audio_async runs at once
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('ELEVENLABS_MAX_CONCURRENCY', '4')),
+            thread_name_prefix='elevenlabs'
+        )
+        # (monotonic time, result) of the last availability probe
+        self._availability_cache = None
     
     def transcribe_audio(self, audio_data: str, model_id: str = "scribe_v1") -> Optional[str]:
         """Transcribe audio using ElevenLabs API"""
@@ -31,47 +62,41 @@ class ElevenLabsService:
             # Decode base64 audio data
             audio_bytes = base64.b64decode(audio_data)
             
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(audio_bytes)
-                temp_file_path = temp_file.name
+            # Prepare request
+            url = f"{self.base_url}/transcribe"
             
-            try:
-                # Prepare request
-                url = f"{self.base_url}/transcribe"
-                
-                # For file upload, we need to use multipart/form-data
-                files = {
-                    'audio': ('audio.wav', open(temp_file_path, 'rb'), 'audio/wav')
-                }
-                
-                data = {
-                    'model_id': model_id
-                }
-                
-                headers = {
-                    "xi-api-key": self.api_key
-                }
-                
-                # Make API request
-                response = requests.post(url, files=files, data=data, headers=headers)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result.get('text', '').strip()
-                else:
-                    print(f"ElevenLabs API error: {response.status_code} - {response.text}")
-                    return self._get_fallback_transcription()
-                    
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            # Upload straight from memory as multipart/form-data
+            files = {
+                'audio': ('audio.wav', io.BytesIO(audio_bytes), 'audio/wav')
+            }
+            
+            data = {
+                'model_id': model_id
+            }
+            
+            # Make API request (the session already carries the API key)
+            response = self._session.post(url, files=files, data=data)
+            
+            if response.status_code == 200:
+                result = response.json()
+                return result.get('text', '').strip()
+            else:
+                print(f"ElevenLabs API error: {response.status_code} - {response.text}")
+                return self._get_fallback_transcription()
                     
         except Exception as e:
             print(f"ElevenLabs transcription error: {e}")
             return self._get_fallback_transcription()
     
+    async def transcribe_audio_async(self, audio_data: str, model_id: str = "scribe_v1") -> Optional[str]:
+        """Transcribe audio without blocking the event loop
+        
+        Several chunks can be transcribed concurrently with
+        ``asyncio.gather(*(service.transcribe_audio_async(c) for c in chunks))``.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.transcribe_audio, audio_data, model_id)
+    
     def get_available_models(self) -> Dict[str, Any]:
         """Get available transcription models"""
         try:
@@ -79,7 +104,7 @@ class ElevenLabsService:
                 return {"error": "API key not found"}
             
             url = f"{self.base_url}/models"
-            response = requests.get(url, headers=self.headers)
+            response = self._session.get(url, headers=self.headers)
             
             if response.status_code == 200:
                 return response.json()
@@ -96,7 +121,7 @@ class ElevenLabsService:
                 return {"error": "API key not found"}
             
             url = f"{self.base_url}/user"
-            response = requests.get(url, headers=self.headers)
+            response = self._session.get(url, headers=self.headers)
             
             if response.status_code == 200:
                 return response.json()
@@ -108,34 +133,27 @@ class ElevenLabsService:
     
     def _get_fallback_transcription(self) -> str:
         """Get fallback transcription when API is unavailable"""
-        fallback_phrases = [
-            "Patient consultation in progress",
-            "Medical examination notes",
-            "Symptom assessment completed",
-            "Treatment plan discussed",
-            "Follow-up scheduled",
-            "Vital signs recorded",
-            "Medication prescribed",
-            "Patient education provided",
-            "Questions answered",
-            "Next appointment confirmed"
-        ]
-        
-        import random
-        return random.choice(fallback_phrases)
+        return random.choice(_FALLBACK_PHRASES)
     
     def is_api_available(self) -> bool:
-        """Check if ElevenLabs API is available"""
+        """Check if ElevenLabs API is available (result cached briefly)"""
         try:
             if not self.api_key:
                 return False
             
+            cached = self._availability_cache
+            if cached is not None and time.monotonic() - cached[0] < _AVAILABILITY_CACHE_SECONDS:
+                return cached[1]
+            
             url = f"{self.base_url}/user"
-            response = requests.get(url, headers=self.headers, timeout=5)
-            return response.status_code == 200
+            response = self._session.get(url, headers=self.headers, timeout=5)
+            available = response.status_code == 200
             
         except Exception:
-            return False
+            available = False
+        
+        self._availability_cache = (time.monotonic(), available)
+        return available
     
     def get_api_status(self) -> Dict[str, Any]:
         """Get API status information"""
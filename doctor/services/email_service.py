@@ -3,18 +3,107 @@ Email Service - Handles all email operations
 """
 
 import smtplib
+import socket
 import os
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
-import base64
-from typing import Dict, Any, Optional
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from email.message import EmailMessage
+from string import Template
+from typing import Dict, Any, List, Optional, Tuple
+
+# Reconnect after this many messages to stay under provider per-session limits
+_MAX_MESSAGES_PER_CONNECTION = 100
+
+# Messages per connection when a bulk send is split across parallel sessions
+_PARALLEL_SHARD_SIZE = 20
+
+# Seconds before a connect or SMTP command gives up and the next config is tried
+_SMTP_TIMEOUT_SECONDS = 10
+
+# Seconds a cached connection may sit idle before it is NOOP-checked
+_SMTP_IDLE_CHECK_SECONDS = 30
+
+# Background sender for the *_async methods; one worker, since every send
+# goes through the service's single cached SMTP session under _smtp_lock
+_EMAIL_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email')
+
+_OTP_SUBJECT = "Patient Alert System - OTP Verification"
+_OTP_BODY_TEMPLATE = Template("""    Hello!
+    
+    Your OTP for Patient Alert System is: $otp
+    
+    This OTP is valid for 10 minutes.
+    
+    If you didn't request this, please ignore this email.
+    
+    Best regards,
+    Patient Alert System Team
+    
+    """)
+
+_WELCOME_SUBJECT_TEMPLATE = Template("Welcome to Patient Alert System - $user_type_title")
+_WELCOME_BODY_TEMPLATE = Template("""    Hello $name!
+    
+    Welcome to Patient Alert System!
+    
+    Your $user_type account has been created successfully.
+    
+    You can now access all the features of our platform.
+    
+    Best regards,
+    Patient Alert System Team
+    
+    """)
+
+_INVITE_HEADER_TEMPLATE = Template("""Dear Patient,
+
+You have received a doctor invitation from Patient Alert System.
+
+Doctor Details:
+- Name: Dr. $doctor_name
+- Specialty: $doctor_specialty
+- Hospital: $doctor_hospital
+
+Invitation Details:
+- Invite Code: $invite_code
+- This code expires in 7 days
+- You can use this code to connect with the doctor
+
+""")
+_INVITE_FOOTER_PRE = """How to Accept:
+1. Open the Patient Alert System app
+2. Go to "Connect with Doctor"
+3. Enter the invite code: """
+_INVITE_FOOTER_POST = """
+4. Follow the prompts to complete the connection
+
+If you don't have the app, you can download it from your app store.
+
+Best regards,
+Patient Alert System Team
+
+---
+This is an automated message. Please do not reply to this email.
+"""
+
+
+@lru_cache(maxsize=1)
+def _local_hostname() -> str:
+    """Local FQDN for SMTP EHLO, resolved once per process"""
+    try:
+        return socket.getfqdn() or 'localhost.localdomain'
+    except OSError:
+        return 'localhost.localdomain'
+
 
 class EmailService:
     """Email service for sending emails"""
     
     def __init__(self):
+        self.logger = logging.getLogger(__name__)
         self.sender_email = os.environ.get('SENDER_EMAIL', 'ramya.sureshkumar.lm@gmail.com')
         self.sender_password = os.environ.get('SENDER_PASSWORD', 'djqs dktf gqor gnqg')
         # Try multiple SMTP configurations
@@ -25,156 +114,372 @@ class EmailService:
             {'server': 'smtp-mail.outlook.com', 'port': 465}
         ]
         self.current_config = 0
+        # Authenticated connection kept open between sends
+        self._smtp = None
+        self._smtp_config = None
+        self._smtp_lock = threading.RLock()
+        self._smtp_sent_count = 0
+        self._smtp_last_used = 0.0
     
     def send_email(self, to_email: str, subject: str, body: str, is_html: bool = False) -> Dict[str, Any]:
         """Send email"""
         try:
             # Check if email configuration is available
             if not self.sender_email or not self.sender_password:
-                print("❌ Email configuration not found")
+                self.logger.error("Email configuration not found")
                 return {
                     'success': False,
                     'error': 'Email configuration not found'
                 }
             
             # Create message
-            msg = MIMEMultipart('mixed')
-            msg['From'] = self.sender_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg['Reply-To'] = self.sender_email
-            msg['X-Mailer'] = 'Patient Alert System'
-            
-            # Add body
-            if is_html:
-                msg.attach(MIMEText(body, 'html'))
-            else:
-                # Send plain text without base64 encoding
-                msg.attach(MIMEText(body, 'plain', 'utf-8'))
+            msg = self._build_message(to_email, subject, body, is_html)
             
             # Connect to server and send email
-            print(f"📧 Attempting to send email to: {to_email}")
-            print(f"📧 EMAIL DEBUG INFO:")
-            print(f"   To: {to_email}")
-            print(f"   From: {self.sender_email}")
-            print(f"   Subject: {subject}")
-            print(f"   Body length: {len(body)} characters")
+            self.logger.debug("Sending email to %s from %s, subject %r, body length %d",
+                to_email, self.sender_email, subject, len(body))
             
             # Try multiple SMTP configurations
             last_error = None
-            for i, config in enumerate(self.smtp_configs):
-                try:
-                    print(f"📧 Trying SMTP config {i+1}/{len(self.smtp_configs)}: {config['server']}:{config['port']}")
-                    
-                    if config['port'] == 465:
-                        # Use SSL for port 465
-                        with smtplib.SMTP_SSL(config['server'], config['port']) as server:
-                            print("📧 Connected via SSL...")
-                            server.login(self.sender_email, self.sender_password)
-                            print("📧 Logged in successfully...")
-                            server.send_message(msg)
-                            print("✅ Email sent successfully via SSL")
-                            return {
-                                'success': True,
-                                'message': f'Email sent successfully via {config["server"]}:{config["port"]}'
-                            }
-                    else:
-                        # Use STARTTLS for port 587
-                        with smtplib.SMTP(config['server'], config['port']) as server:
-                            print("📧 Connected to SMTP...")
-                            server.starttls()
-                            print("📧 Started TLS...")
-                            server.login(self.sender_email, self.sender_password)
-                            print("📧 Logged in successfully...")
-                            server.send_message(msg)
-                            print("✅ Email sent successfully via STARTTLS")
-                            return {
-                                'success': True,
-                                'message': f'Email sent successfully via {config["server"]}:{config["port"]}'
-                            }
-                            
-                except Exception as e:
-                    print(f"❌ Failed with config {i+1}: {e}")
-                    last_error = e
-                    continue
+            for i, config in self._config_order():
+                self.logger.debug("Trying SMTP config %d/%d: %s:%d",
+                    i + 1, len(self.smtp_configs), config['server'], config['port'])
+                with self._smtp_lock:
+                    try:
+                        self._send_on_cached_connection(msg, config)
+                    except Exception as e:
+                        self.logger.debug("Failed with SMTP config %d: %s", i + 1, e)
+                        self._close_connection()
+                        last_error = e
+                        continue
+                
+                self.current_config = i
+                self.logger.info("Email sent to %s via %s:%d", to_email, config['server'], config['port'])
+                return {
+                    'success': True,
+                    'message': f'Email sent successfully via {config["server"]}:{config["port"]}'
+                }
             
             # If all configurations failed
-            print(f"❌ All SMTP configurations failed. Last error: {last_error}")
+            self.logger.error("All SMTP configurations failed. Last error: %s", last_error)
             return {
                 'success': False,
                 'error': f'All SMTP configurations failed. Last error: {str(last_error)}'
             }
                 
         except smtplib.SMTPAuthenticationError as e:
-            print(f"❌ SMTP Authentication Error: {e}")
+            self.logger.error("SMTP authentication error: %s", e)
             return {
                 'success': False,
                 'error': 'SMTP authentication failed. Please check email credentials.'
             }
         except smtplib.SMTPRecipientsRefused as e:
-            print(f"❌ SMTP Recipients Refused: {e}")
+            self.logger.error("SMTP recipients refused: %s", e)
             return {
                 'success': False,
                 'error': 'Recipient email address is invalid or refused.'
             }
         except smtplib.SMTPServerDisconnected as e:
-            print(f"❌ SMTP Server Disconnected: {e}")
+            self.logger.error("SMTP server disconnected: %s", e)
             return {
                 'success': False,
                 'error': 'SMTP server disconnected unexpectedly.'
             }
         except Exception as e:
-            print(f"❌ Email sending error: {e}")
+            self.logger.error("Email sending error: %s", e)
             return {
                 'success': False,
                 'error': f'Failed to send email: {str(e)}'
             }
     
-    def send_otp_email(self, email: str, otp: str) -> Dict[str, Any]:
-        """Send OTP email"""
+    def _build_message(self, to_email: str, subject: str, body: str, is_html: bool = False) -> EmailMessage:
+        """Build a single-part message from the configured sender"""
+        msg = EmailMessage()
+        msg['From'] = self.sender_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg['Reply-To'] = self.sender_email
+        msg['X-Mailer'] = 'Patient Alert System'
+        
+        if is_html:
+            msg.set_content(body, subtype='html')
+        else:
+            msg.set_content(body)
+        
+        return msg
+    
+    def _connect(self, config: Dict[str, Any]) -> smtplib.SMTP:
+        """Open and authenticate an SMTP connection for one config"""
+        local_hostname = _local_hostname()
+        if config['port'] == 465:
+            server = smtplib.SMTP_SSL(config['server'], config['port'], local_hostname=local_hostname,
+                                      timeout=_SMTP_TIMEOUT_SECONDS)
+        else:
+            server = smtplib.SMTP(config['server'], config['port'], local_hostname=local_hostname,
+                                  timeout=_SMTP_TIMEOUT_SECONDS)
+        
         try:
-            subject = "Patient Alert System - OTP Verification"
-            body = f"""    Hello!
+            if config['port'] != 465:
+                server.starttls()
+            server.login(self.sender_email, self.sender_password)
+        except Exception:
+            server.close()
+            raise
+        
+        return server
     
-    Your OTP for Patient Alert System is: {otp}
+    def _config_order(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """SMTP configs to try, starting with the last one that worked"""
+        configs = list(enumerate(self.smtp_configs))
+        return configs[self.current_config:] + configs[:self.current_config]
     
-    This OTP is valid for 10 minutes.
+    def _send_on_cached_connection(self, msg: EmailMessage, config: Dict[str, Any]) -> None:
+        """Send msg on the cached connection, reconnecting once if it was dropped
+        
+        Callers must hold self._smtp_lock.
+        """
+        server = self._get_connection(config)
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.logger.debug("Cached SMTP connection was dropped, reconnecting")
+            self._close_connection()
+            server = self._get_connection(config)
+            server.send_message(msg)
+        self._smtp_sent_count += 1
+        self._smtp_last_used = time.monotonic()
     
-    If you didn't request this, please ignore this email.
+    def _get_connection(self, config: Dict[str, Any]) -> smtplib.SMTP:
+        """Return a live connection for config, reusing the open one if healthy
+        
+        A connection used within the last _SMTP_IDLE_CHECK_SECONDS is reused
+        as-is; an older one is NOOP-checked first. Callers must hold
+        self._smtp_lock.
+        """
+        if (self._smtp is not None and self._smtp_config is config
+                and self._smtp_sent_count < _MAX_MESSAGES_PER_CONNECTION):
+            if time.monotonic() - self._smtp_last_used < _SMTP_IDLE_CHECK_SECONDS:
+                return self._smtp
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+        
+        self._close_connection()
+        self._smtp = self._connect(config)
+        self._smtp_config = config
+        self._smtp_sent_count = 0
+        self._smtp_last_used = time.monotonic()
+        return self._smtp
     
-    Best regards,
-    Patient Alert System Team
+    def _close_connection(self) -> None:
+        """Close the cached connection, if any"""
+        with self._smtp_lock:
+            server, self._smtp, self._smtp_config = self._smtp, None, None
+            if server is None:
+                return
+            try:
+                server.quit()
+            except Exception:
+                try:
+                    server.close()
+                except Exception:
+                    pass
+    
+    def close(self) -> None:
+        """Close the SMTP connection held by this service"""
+        self._close_connection()
+    
+    def __del__(self):
+        try:
+            self._close_connection()
+        except Exception:
+            pass
+    
+    def send_bulk_emails(self, emails: List[Dict[str, Any]], max_workers: int = 1) -> List[Dict[str, Any]]:
+        """Send several emails back to back on one SMTP connection
+        
+        With max_workers > 1, batches larger than one shard are split and
+        sent concurrently, each shard on its own short-lived connection.
+        
+        Args:
+            emails: List of dicts with 'to_email', 'subject', 'body' and
+                optional 'is_html'
+            max_workers: Maximum number of SMTP sessions to use at once
+        
+        Returns:
+            list: One result dict per email, in the same order
+        """
+        if not emails:
+            return []
+        
+        if not self.sender_email or not self.sender_password:
+            self.logger.error("Email configuration not found")
+            return [{'success': False, 'error': 'Email configuration not found'} for _ in emails]
+        
+        messages = [
+            self._build_message(email['to_email'], email['subject'], email['body'], email.get('is_html', False))
+            for email in emails
+        ]
+        
+        if max_workers > 1 and len(messages) > _PARALLEL_SHARD_SIZE:
+            return self._send_messages_parallel(messages, max_workers)
+        
+        self.logger.debug("Sending %d emails in one SMTP session", len(messages))
+        
+        last_error = None
+        for i, config in self._config_order():
+            with self._smtp_lock:
+                try:
+                    server = self._get_connection(config)
+                except Exception as e:
+                    self.logger.debug("Failed with SMTP config %d: %s", i + 1, e)
+                    self._close_connection()
+                    last_error = e
+                    continue
+                
+                results = []
+                reconnected = False
+                for msg in messages:
+                    try:
+                        # Start a fresh session once the provider's per-connection cap is reached
+                        if self._smtp_sent_count >= _MAX_MESSAGES_PER_CONNECTION:
+                            server = self._get_connection(config)
+                        try:
+                            result = self._send_message(server, msg, config)
+                        except smtplib.SMTPServerDisconnected:
+                            if reconnected:
+                                raise
+                            # The cached session may have been dropped while idle; retry once
+                            reconnected = True
+                            self._close_connection()
+                            server = self._get_connection(config)
+                            result = self._send_message(server, msg, config)
+                    except smtplib.SMTPServerDisconnected as e:
+                        # Connection is gone; report the rest as failed
+                        self._close_connection()
+                        results.extend(self._disconnected_results(e, len(messages) - len(results)))
+                        break
+                    except Exception as e:
+                        result = {'success': False, 'error': f'Failed to send email: {str(e)}'}
+                    if result['success']:
+                        self._smtp_sent_count += 1
+                        self._smtp_last_used = time.monotonic()
+                    results.append(result)
+            
+            self.current_config = i
+            sent = sum(1 for result in results if result['success'])
+            self.logger.info("Sent %d/%d emails via %s:%d", sent, len(emails), config['server'], config['port'])
+            return results
+        
+        self.logger.error("All SMTP configurations failed. Last error: %s", last_error)
+        return self._all_configs_failed_results(last_error, len(emails))
+    
+    def _send_messages_parallel(self, messages: List[EmailMessage], max_workers: int) -> List[Dict[str, Any]]:
+        """Split messages into shards and send them on concurrent connections"""
+        shards = [
+            (start, messages[start:start + _PARALLEL_SHARD_SIZE])
+            for start in range(0, len(messages), _PARALLEL_SHARD_SIZE)
+        ]
+        self.logger.debug("Sending %d emails in %d parallel SMTP sessions", len(messages), len(shards))
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(shards))) as executor:
+            futures = {executor.submit(self._send_shard, shard): start for start, shard in shards}
+            for future in as_completed(futures):
+                start = futures[future]
+                shard_results = future.result()
+                results[start:start + len(shard_results)] = shard_results
+        
+        sent = sum(1 for result in results if result['success'])
+        self.logger.info("Sent %d/%d emails in %d parallel SMTP sessions", sent, len(messages), len(shards))
+        return results
+    
+    def _send_shard(self, messages: List[EmailMessage]) -> List[Dict[str, Any]]:
+        """Send messages on a dedicated connection that is closed afterwards"""
+        last_error = None
+        for i, config in self._config_order():
+            try:
+                server = self._connect(config)
+            except Exception as e:
+                self.logger.debug("Failed with SMTP config %d: %s", i + 1, e)
+                last_error = e
+                continue
+            
+            try:
+                results = []
+                for msg in messages:
+                    try:
+                        results.append(self._send_message(server, msg, config))
+                    except smtplib.SMTPServerDisconnected as e:
+                        results.extend(self._disconnected_results(e, len(messages) - len(results)))
+                        break
+                return results
+            finally:
+                try:
+                    server.quit()
+                except Exception:
+                    server.close()
+        
+        return self._all_configs_failed_results(last_error, len(messages))
+    
+    def _send_message(self, server: smtplib.SMTP, msg: EmailMessage, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one message and describe the outcome; disconnects are re-raised"""
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            raise
+        except smtplib.SMTPRecipientsRefused:
+            return {
+                'success': False,
+                'error': 'Recipient email address is invalid or refused.'
+            }
+        except Exception as e:
+            return {'success': False, 'error': f'Failed to send email: {str(e)}'}
+        
+        return {
+            'success': True,
+            'message': f'Email sent successfully via {config["server"]}:{config["port"]}'
+        }
+    
+    def _disconnected_results(self, error: Exception, count: int) -> List[Dict[str, Any]]:
+        """Failure results for messages left unsent after a disconnect"""
+        return [
+            {'success': False, 'error': f'SMTP server disconnected unexpectedly: {str(error)}'}
+            for _ in range(count)
+        ]
     
-    """
+    def _all_configs_failed_results(self, last_error: Exception, count: int) -> List[Dict[str, Any]]:
+        """Failure results for a batch no SMTP config could send"""
+        return [
+            {'success': False, 'error': f'All SMTP configurations failed. Last error: {str(last_error)}'}
+            for _ in range(count)
+        ]
+    
+    def send_otp_email(self, email: str, otp: str) -> Dict[str, Any]:
+        """Send OTP email"""
+        try:
+            subject = _OTP_SUBJECT
+            body = _OTP_BODY_TEMPLATE.substitute(otp=otp)
             
             result = self.send_email(email, subject, body)
             
             if result['success']:
-                print(f"✅ OTP email sent to: {email}")
-                print(f"📧 Check your email in 1-2 minutes")
-                print("✅ Primary email method successful")
+                self.logger.info("OTP email sent to %s", email)
             else:
-                print(f"❌ Failed to send OTP email: {result['error']}")
-                print(f"🔐 OTP for manual verification: {otp}")
-                print("📧 Alternative: Check your email manually")
-                print("=" * 50)
-                print("📧 EMAIL CONTENT (for manual verification):")
-                print(f"To: {email}")
-                print(f"Subject: {subject}")
-                print(f"Body: {body}")
-                print("=" * 50)
+                self.logger.error("Failed to send OTP email to %s: %s", email, result['error'])
+                self.logger.warning("OTP for manual verification: %s\nTo: %s\nSubject: %s\nBody: %s",
+                    otp, email, subject, body)
             
             return result
             
         except Exception as e:
-            print(f"❌ OTP email error: {e}")
-            print(f"🔐 OTP for manual verification: {otp}")
-            print("=" * 50)
-            print("📧 EMAIL CONTENT (for manual verification):")
-            print(f"To: {email}")
-            print(f"Subject: Patient Alert System - OTP Verification")
-            print(f"Body: Your OTP is: {otp}")
-            print("=" * 50)
+            self.logger.error("OTP email error: %s", e)
+            self.logger.warning("OTP for manual verification: %s\nTo: %s\nSubject: %s",
+                otp, email, _OTP_SUBJECT)
             return {
                 'success': False,
                 'error': f'Failed to send OTP email: {str(e)}'
@@ -183,116 +488,138 @@ class EmailService:
     def send_welcome_email(self, email: str, name: str, user_type: str) -> Dict[str, Any]:
         """Send welcome email"""
         try:
-            subject = f"Welcome to Patient Alert System - {user_type.title()}"
-            body = f"""    Hello {name}!
-    
-    Welcome to Patient Alert System!
-    
-    Your {user_type} account has been created successfully.
-    
-    You can now access all the features of our platform.
-    
-    Best regards,
-    Patient Alert System Team
-    
-    """
+            subject = _WELCOME_SUBJECT_TEMPLATE.substitute(user_type_title=user_type.title())
+            body = _WELCOME_BODY_TEMPLATE.substitute(name=name, user_type=user_type)
             
             return self.send_email(email, subject, body)
             
         except Exception as e:
-            print(f"❌ Welcome email error: {e}")
+            self.logger.error("Welcome email error: %s", e)
             return {
                 'success': False,
                 'error': f'Failed to send welcome email: {str(e)}'
             }
     
+    def _build_invite_email(self, invite_code: str, doctor_info: dict, custom_message: str = '') -> Tuple[str, str]:
+        """Build the invite email subject and body"""
+        doctor_name = doctor_info.get('name', 'Doctor')
+        doctor_specialty = doctor_info.get('specialty', 'General Practice')
+        doctor_hospital = doctor_info.get('hospital', '')
+        
+        subject = f"Doctor Invitation - {doctor_name} wants to connect with you"
+        
+        parts = [_INVITE_HEADER_TEMPLATE.substitute(
+            doctor_name=doctor_name,
+            doctor_specialty=doctor_specialty,
+            doctor_hospital=doctor_hospital,
+            invite_code=invite_code
+        )]
+        if custom_message:
+            parts.append(f'Personal Message from Dr. {doctor_name}:\n"{custom_message}"\n\n')
+        parts.extend((_INVITE_FOOTER_PRE, invite_code, _INVITE_FOOTER_POST))
+        
+        return subject, "".join(parts)
+    
     def send_invite_email(self, patient_email: str, invite_code: str, doctor_info: dict, custom_message: str = '') -> Dict[str, Any]:
         """Send invite email to patient"""
         try:
-            doctor_name = doctor_info.get('name', 'Doctor')
-            doctor_specialty = doctor_info.get('specialty', 'General Practice')
-            doctor_hospital = doctor_info.get('hospital', '')
-            
-            subject = f"Doctor Invitation - {doctor_name} wants to connect with you"
-            
-            body = f"""Dear Patient,
-
-You have received a doctor invitation from Patient Alert System.
-
-Doctor Details:
-- Name: Dr. {doctor_name}
-- Specialty: {doctor_specialty}
-- Hospital: {doctor_hospital}
-
-Invitation Details:
-- Invite Code: {invite_code}
-- This code expires in 7 days
-- You can use this code to connect with the doctor
-
-"""
-            
-            if custom_message:
-                body += f"Personal Message from Dr. {doctor_name}:\n"
-                body += f'"{custom_message}"\n\n'
-            
-            body += """How to Accept:
-1. Open the Patient Alert System app
-2. Go to "Connect with Doctor"
-3. Enter the invite code: """ + invite_code + """
-4. Follow the prompts to complete the connection
-
-If you don't have the app, you can download it from your app store.
-
-Best regards,
-Patient Alert System Team
-
----
-This is an automated message. Please do not reply to this email.
-"""
+            subject, body = self._build_invite_email(invite_code, doctor_info, custom_message)
             
             result = self.send_email(patient_email, subject, body)
             
             if result['success']:
-                print(f"✅ Invite email sent to patient: {patient_email}")
-                print(f"📧 Invite code: {invite_code}")
+                self.logger.info("Invite email sent to patient %s with invite code %s", patient_email, invite_code)
             else:
-                print(f"❌ Failed to send invite email: {result['error']}")
+                self.logger.error("Failed to send invite email: %s", result['error'])
             
             return result
             
         except Exception as e:
-            print(f"❌ Invite email error: {e}")
+            self.logger.error("Invite email error: %s", e)
             return {
                 'success': False,
                 'error': f'Failed to send invite email: {str(e)}'
             }
     
+    def send_invite_emails(self, invites: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send invite emails to several patients over one SMTP connection
+        
+        Args:
+            invites: List of dicts with 'patient_email', 'invite_code',
+                'doctor_info' and optional 'custom_message'
+        
+        Returns:
+            list: One result dict per invite, in the same order
+        """
+        try:
+            emails = []
+            for invite in invites:
+                subject, body = self._build_invite_email(
+                    invite['invite_code'],
+                    invite['doctor_info'],
+                    invite.get('custom_message', '')
+                )
+                emails.append({'to_email': invite['patient_email'], 'subject': subject, 'body': body})
+            
+            results = self.send_bulk_emails(emails)
+            
+            for invite, result in zip(invites, results):
+                if result['success']:
+                    self.logger.info("Invite email sent to patient %s", invite['patient_email'])
+                else:
+                    self.logger.error("Failed to send invite email to %s: %s", invite['patient_email'], result['error'])
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error("Invite email error: %s", e)
+            return [
+                {'success': False, 'error': f'Failed to send invite email: {str(e)}'}
+                for _ in invites
+            ]
+    
+    def send_email_async(self, to_email: str, subject: str, body: str, is_html: bool = False) -> Future:
+        """Queue send_email on a background thread; the future holds its result"""
+        return _EMAIL_POOL.submit(self.send_email, to_email, subject, body, is_html)
+    
+    def send_otp_email_async(self, email: str, otp: str) -> Future:
+        """Queue send_otp_email on a background thread"""
+        return _EMAIL_POOL.submit(self.send_otp_email, email, otp)
+    
+    def send_welcome_email_async(self, email: str, name: str, user_type: str) -> Future:
+        """Queue send_welcome_email on a background thread"""
+        return _EMAIL_POOL.submit(self.send_welcome_email, email, name, user_type)
+    
+    def send_invite_email_async(self, patient_email: str, invite_code: str, doctor_info: dict, custom_message: str = '') -> Future:
+        """Queue send_invite_email on a background thread"""
+        return _EMAIL_POOL.submit(self.send_invite_email, patient_email, invite_code, doctor_info, custom_message)
+    
     def is_configured(self) -> bool:
         """Check if email service is configured"""
         return bool(self.sender_email and self.sender_password)
     
-    def test_network_connectivity(self) -> Dict[str, Any]:
-        """Test network connectivity to SMTP servers"""
-        import socket
-        
-        results = {}
-        for config in self.smtp_configs:
-            try:
-                print(f"🔍 Testing connectivity to {config['server']}:{config['port']}")
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(10)  # 10 second timeout
-                result = sock.connect_ex((config['server'], config['port']))
-                sock.close()
+    def _probe_smtp_server(self, config: Dict[str, Any]) -> Tuple[str, str]:
+        """Check TCP connectivity to one SMTP server"""
+        key = f"{config['server']}:{config['port']}"
+        try:
+            self.logger.debug("Testing connectivity to %s", key)
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(_SMTP_TIMEOUT_SECONDS)
+            result = sock.connect_ex((config['server'], config['port']))
+            sock.close()
+            
+            if result == 0:
+                self.logger.debug("%s - Connected", key)
+                return key, "Connected"
+            else:
+                self.logger.debug("%s - Failed (Error: %s)", key, result)
+                return key, f"Failed (Error: {result})"
                 
-                if result == 0:
-                    print(f"✅ {config['server']}:{config['port']} - Connected")
-                    results[f"{config['server']}:{config['port']}"] = "Connected"
-                else:
-                    print(f"❌ {config['server']}:{config['port']} - Failed (Error: {result})")
-                    results[f"{config['server']}:{config['port']}"] = f"Failed (Error: {result})"
-                    
-            except Exception as e:
-                print(f"❌ {config['server']}:{config['port']} - Exception: {e}")
-                results[f"{config['server']}:{config['port']}"] = f"Exception: {e}"
-        
-        return results
+        except Exception as e:
+            self.logger.debug("%s - Exception: %s", key, e)
+            return key, f"Exception: {e}"
+    
+    def test_network_connectivity(self) -> Dict[str, Any]:
+        """Test network connectivity to SMTP servers (probed concurrently)"""
+        with ThreadPoolExecutor(max_workers=len(self.smtp_configs)) as executor:
+            return dict(executor.map(self._probe_smtp_server, self.smtp_configs))
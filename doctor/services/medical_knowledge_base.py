@@ -1,8 +1,25 @@
 import os
 import json
-from typing import List, Dict, Any
+import hashlib
+import time
+import atexit
+import threading
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
+from collections import Counter
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+_KNOWLEDGE_FILE = "data/medical_knowledge.json"
+
+# Minimum seconds between writes triggered by add_knowledge_chunk; additions
+# inside the window are written by a timer when it ends
+_SAVE_DEBOUNCE_SECONDS = 5
 
 class MedicalKnowledgeBase:
     """
@@ -13,7 +30,18 @@ class MedicalKnowledgeBase:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.knowledge_chunks = []
+        self._by_type: Dict[str, List[int]] = {}
+        self._by_trimester: Dict[str, List[int]] = {}
+        self._type_counts: Counter = Counter()
+        self._trimester_counts: Counter = Counter()
+        self._dirty = False
+        self._last_save = 0.0
+        self._last_saved_hash = None
+        self._save_timer = None
+        self._save_lock = threading.RLock()
         self._initialize_knowledge_base()
+        self._build_indexes()
+        atexit.register(self.flush)
     
     def _initialize_knowledge_base(self):
         """Initialize the medical knowledge base with pregnancy care guidelines."""
@@ -205,6 +233,27 @@ class MedicalKnowledgeBase:
             }
         ]
     
+    def _build_indexes(self):
+        """Rebuild the type/trimester lookup indexes and counts from knowledge_chunks."""
+        self._by_type = {}
+        self._by_trimester = {}
+        self._type_counts = Counter()
+        self._trimester_counts = Counter()
+        for position, chunk in enumerate(self.knowledge_chunks):
+            self._index_chunk(position, chunk)
+    
+    def _index_chunk(self, position: int, chunk: Dict[str, Any]):
+        """Record a chunk's position under its lowercased type and trimester."""
+        metadata = chunk.get('metadata', {})
+        chunk_type = metadata.get('type', '')
+        self._by_type.setdefault(chunk_type.lower(), []).append(position)
+        trimester = metadata.get('trimester', '')
+        self._by_trimester.setdefault(trimester.lower(), []).append(position)
+        
+        self._type_counts[metadata.get('type', 'unknown')] += 1
+        if trimester and trimester != 'unknown':
+            self._trimester_counts[trimester] += 1
+    
     def get_knowledge_chunks(self, filter_type: str = None, trimester: str = None) -> List[Dict[str, Any]]:
         """
         Get medical knowledge chunks with optional filtering.
@@ -214,23 +263,24 @@ class MedicalKnowledgeBase:
             trimester: Filter by trimester (first, second, third)
         
         Returns:
-            List of filtered knowledge chunks
+            List of filtered knowledge chunks. When no filter is given the
+            underlying list is returned as-is and must be treated as read-only.
         """
-        filtered_chunks = self.knowledge_chunks.copy()
-        
-        if filter_type:
-            filtered_chunks = [
-                chunk for chunk in filtered_chunks
-                if chunk['metadata'].get('type', '').lower() == filter_type.lower()
-            ]
+        if not filter_type and not trimester:
+            return self.knowledge_chunks
         
-        if trimester:
-            filtered_chunks = [
-                chunk for chunk in filtered_chunks
-                if chunk['metadata'].get('trimester', '').lower() == trimester.lower()
-            ]
+        if filter_type and trimester:
+            positions = sorted(
+                set(self._by_type.get(filter_type.lower(), ()))
+                & set(self._by_trimester.get(trimester.lower(), ()))
+            )
+        elif filter_type:
+            positions = self._by_type.get(filter_type.lower(), ())
+        else:
+            positions = self._by_trimester.get(trimester.lower(), ())
         
-        return filtered_chunks
+        chunks = self.knowledge_chunks
+        return [chunks[position] for position in positions]
     
     def add_knowledge_chunk(self, content: str, metadata: Dict[str, Any]) -> bool:
         """
@@ -254,7 +304,9 @@ class MedicalKnowledgeBase:
             }
             
             self.knowledge_chunks.append(chunk)
-            self._save_knowledge_to_file()
+            self._index_chunk(len(self.knowledge_chunks) - 1, chunk)
+            self._dirty = True
+            self._schedule_save()
             
             self.logger.info("Added new knowledge chunk successfully")
             return True
@@ -263,24 +315,66 @@ class MedicalKnowledgeBase:
             self.logger.error(f"Error adding knowledge chunk: {str(e)}")
             return False
     
+    def _schedule_save(self):
+        """Save now, or at the end of the debounce window if a save just happened."""
+        with self._save_lock:
+            remaining = self._last_save + _SAVE_DEBOUNCE_SECONDS - time.monotonic()
+            if remaining <= 0:
+                self._save_knowledge_to_file()
+            elif self._save_timer is None:
+                self._save_timer = threading.Timer(remaining, self._flush_pending)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+    
+    def _flush_pending(self):
+        """Timer callback that writes additions made during the debounce window."""
+        with self._save_lock:
+            self._save_timer = None
+            self.flush()
+    
+    def flush(self):
+        """Write pending knowledge chunk additions to file."""
+        with self._save_lock:
+            if self._dirty:
+                self._save_knowledge_to_file()
+    
     def _save_knowledge_to_file(self):
-        """Save knowledge chunks to file."""
-        try:
-            os.makedirs("data", exist_ok=True)
-            with open("data/medical_knowledge.json", "w") as f:
-                json.dump(self.knowledge_chunks, f, indent=2)
-            
-            self.logger.info("Medical knowledge base saved to file")
-            
-        except Exception as e:
-            self.logger.error(f"Error saving knowledge base: {str(e)}")
+        """Save knowledge chunks to file, replacing it atomically."""
+        with self._save_lock:
+            try:
+                os.makedirs("data", exist_ok=True)
+                if ORJSON_AVAILABLE:
+                    payload = orjson.dumps(self.knowledge_chunks, option=orjson.OPT_INDENT_2)
+                else:
+                    payload = json.dumps(self.knowledge_chunks, indent=2).encode("utf-8")
+                
+                # Skip the write when the file already holds this content
+                payload_hash = hashlib.blake2b(payload).digest()
+                if payload_hash == self._last_saved_hash:
+                    self._dirty = False
+                    return
+                
+                tmp_path = f"{_KNOWLEDGE_FILE}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, _KNOWLEDGE_FILE)
+                
+                self._last_saved_hash = payload_hash
+                self._dirty = False
+                self._last_save = time.monotonic()
+                self.logger.info("Medical knowledge base saved to file")
+                
+            except Exception as e:
+                self.logger.error(f"Error saving knowledge base: {str(e)}")
     
     def _load_knowledge_from_file(self):
         """Load knowledge chunks from file."""
         try:
-            if os.path.exists("data/medical_knowledge.json"):
-                with open("data/medical_knowledge.json", "r") as f:
-                    self.knowledge_chunks = json.load(f)
+            if os.path.exists(_KNOWLEDGE_FILE):
+                with open(_KNOWLEDGE_FILE, "rb") as f:
+                    raw = f.read()
+                self.knowledge_chunks = json.loads(raw)
+                self._last_saved_hash = hashlib.blake2b(raw).digest()
                 
                 self.logger.info(f"Loaded {len(self.knowledge_chunks)} knowledge chunks from file")
             else:
@@ -292,20 +386,24 @@ class MedicalKnowledgeBase:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the knowledge base."""
-        type_counts = {}
-        trimester_counts = {}
-        
-        for chunk in self.knowledge_chunks:
-            chunk_type = chunk['metadata'].get('type', 'unknown')
-            type_counts[chunk_type] = type_counts.get(chunk_type, 0) + 1
-            
-            trimester = chunk['metadata'].get('trimester', 'unknown')
-            if trimester != 'unknown':
-                trimester_counts[trimester] = trimester_counts.get(trimester, 0) + 1
-        
         return {
             "total_chunks": len(self.knowledge_chunks),
-            "type_distribution": type_counts,
-            "trimester_distribution": trimester_counts,
+            "type_distribution": dict(self._type_counts),
+            "trimester_distribution": dict(self._trimester_counts),
             "last_updated": datetime.utcnow().isoformat()
         }
+
+
+# Process-wide instance, shared so the knowledge file is loaded and indexed once
+_instance: Optional[MedicalKnowledgeBase] = None
+_instance_lock = threading.Lock()
+
+
+def get_knowledge_base() -> MedicalKnowledgeBase:
+    """Get the shared MedicalKnowledgeBase instance, creating it on first use"""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = MedicalKnowledgeBase()
+    return _instance
@@ -1,11 +1,130 @@
 import os
 import json
+import asyncio
+import threading
+import numpy as np
+import httpx
 import openai
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, date, time, timedelta
 import logging
-from .vector_database import VectorDatabase
-from .medical_knowledge_base import MedicalKnowledgeBase
+from .vector_database import get_vector_db
+from .medical_knowledge_base import get_knowledge_base
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401 - lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Reuse retrieved chunks when a new search query's embedding is at least this similar
+_SEMANTIC_CACHE_TAU = float(os.getenv('RAG_SEMANTIC_CACHE_TAU', '0.97'))
+# Cached queries kept per query type
+_SEMANTIC_CACHE_MAX_SIZE = 1000
+
+# Concurrent OpenAI requests per summary batch; the client retries 429s with backoff
+_OPENAI_CONCURRENCY = int(os.getenv('OPENAI_CONCURRENCY', '8'))
+_OPENAI_MAX_RETRIES = 5
+
+# Pooled keep-alive connections for the synchronous OpenAI client
+_OPENAI_TIMEOUT_SECONDS = 60
+_OPENAI_MAX_CONNECTIONS = 64
+_OPENAI_MAX_KEEPALIVE_CONNECTIONS = 32
+
+
+def _canonicalize(obj: Any) -> Any:
+    """Convert patient data to plain JSON types (ISO datetimes, str Decimals/ObjectIds)."""
+    if isinstance(obj, dict):
+        return {str(key): _canonicalize(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple, set)):
+        return [_canonicalize(value) for value in obj]
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    # Decimal, ObjectId and anything else without a JSON form
+    return str(obj)
+
+
+class _SemanticCache:
+    """
+    Fixed-capacity LRU of query embeddings -> retrieved chunks for one query type.
+    Embeddings live in one preallocated matrix, so a lookup is a single
+    matrix-vector product, computed outside the lock.
+    """
+    
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        """Drop every cached query."""
+        with self._lock:
+            self._matrix: Optional[np.ndarray] = None  # (capacity, D) unit rows, allocated on first put
+            self._count = 0
+            self._queries: List[Optional[str]] = [None] * self._capacity
+            self._chunks: List[Optional[List[Dict[str, Any]]]] = [None] * self._capacity
+            self._slots: Dict[str, int] = {}
+            self._last_used = np.zeros(self._capacity, dtype=np.int64)
+            self._tick = 0
+    
+    def get(self, query: str, embedding: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        """Chunks for this query, or for the most similar cached query above the threshold."""
+        with self._lock:
+            slot = self._slots.get(query)
+            if slot is None:
+                if not self._count or self._matrix.shape[1] != len(embedding):
+                    return None
+                rows = self._matrix[:self._count]
+        
+        if slot is None:
+            # Rows may be overwritten meanwhile; the best one is re-checked under the lock
+            slot = int(np.argmax(rows @ embedding))
+        
+        with self._lock:
+            if self._queries[slot] != query and (
+                slot >= self._count or float(self._matrix[slot] @ embedding) < _SEMANTIC_CACHE_TAU
+            ):
+                return None
+            self._tick += 1
+            self._last_used[slot] = self._tick
+            return list(self._chunks[slot])
+    
+    def put(self, query: str, embedding: np.ndarray, chunks: List[Dict[str, Any]]):
+        """Remember retrieved chunks for a query, evicting the least recently used entry."""
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(embedding):
+                self._matrix = np.empty((self._capacity, len(embedding)), dtype=np.float32)
+                self._count = 0
+                self._slots.clear()
+            
+            slot = self._slots.get(query)
+            if slot is None:
+                if self._count < self._capacity:
+                    slot = self._count
+                    self._count += 1
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    del self._slots[self._queries[slot]]
+                self._slots[query] = slot
+                self._queries[slot] = query
+            
+            self._matrix[slot] = embedding
+            self._chunks[slot] = list(chunks)
+            self._tick += 1
+            self._last_used[slot] = self._tick
+
 
 class RAGMedicalService:
     """
@@ -15,11 +134,28 @@ class RAGMedicalService:
     
     def __init__(self):
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
-        self.vector_db = VectorDatabase()
-        self.knowledge_base = MedicalKnowledgeBase()
+        self.vector_db = get_vector_db()
+        self.knowledge_base = get_knowledge_base()
         self.logger = logging.getLogger(__name__)
+        # query_type -> cache of search query embeddings and the chunks they retrieved
+        self._semantic_caches: Dict[str, _SemanticCache] = {}
+        # One client for all sync requests, so connections and TLS sessions are reused
+        self._openai_client = None
         
-        if not self.openai_api_key:
+        if self.openai_api_key:
+            self._openai_client = openai.OpenAI(
+                api_key=self.openai_api_key,
+                max_retries=_OPENAI_MAX_RETRIES,
+                http_client=httpx.Client(
+                    http2=HTTP2_AVAILABLE,
+                    timeout=_OPENAI_TIMEOUT_SECONDS,
+                    limits=httpx.Limits(
+                        max_connections=_OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=_OPENAI_MAX_KEEPALIVE_CONNECTIONS
+                    )
+                )
+            )
+        else:
             self.logger.warning("OpenAI API key not found. RAG features will be limited.")
     
     def get_medical_context(self, patient_data: Dict[str, Any], query_type: str = "general") -> List[Dict[str, Any]]:
@@ -40,6 +176,18 @@ class RAGMedicalService:
             # Build search query
             search_query = self._build_search_query(patient_data, query_type, medical_concepts)
             
+            # Reuse chunks retrieved for a near-identical query
+            query_embedding = self.vector_db.embed_query(search_query)
+            if query_embedding is not None:
+                semantic_cache = self._semantic_caches.get(query_type)
+                if semantic_cache is None:
+                    semantic_cache = self._semantic_caches.setdefault(
+                        query_type, _SemanticCache(_SEMANTIC_CACHE_MAX_SIZE)
+                    )
+                cached = semantic_cache.get(search_query, query_embedding)
+                if cached is not None:
+                    return cached
+            
             # Retrieve relevant knowledge chunks
             context_chunks = self.vector_db.search_similar_chunks(
                 query=search_query,
@@ -47,6 +195,9 @@ class RAGMedicalService:
                 filter_type=query_type
             )
             
+            if query_embedding is not None:
+                semantic_cache.put(search_query, query_embedding, context_chunks)
+            
             return context_chunks
             
         except Exception as e:
@@ -71,32 +222,13 @@ class RAGMedicalService:
             Enhanced AI summary with medical context
         """
         try:
-            if not self.openai_api_key:
+            if not self._openai_client:
                 return self._generate_fallback_summary(patient_data)
             
-            # Prepare context for OpenAI
-            context_text = self._prepare_context_text(medical_context)
-            
-            # Build enhanced prompt with medical context
-            enhanced_prompt = self._build_enhanced_prompt(
-                patient_data, 
-                context_text, 
-                query_type
-            )
-            
             # Generate AI summary with OpenAI
-            response = openai.ChatCompletion.create(
+            response = self._openai_client.chat.completions.create(
                 model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt(query_type)
-                    },
-                    {
-                        "role": "user",
-                        "content": enhanced_prompt
-                    }
-                ],
+                messages=self._build_messages(patient_data, medical_context, query_type),
                 max_tokens=2000,
                 temperature=0.3
             )
@@ -110,6 +242,111 @@ class RAGMedicalService:
             self.logger.error(f"Error generating enhanced summary: {str(e)}")
             return self._generate_fallback_summary(patient_data)
     
+    def generate_enhanced_summary_batch(self, summary_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate several enhanced summaries concurrently.
+        
+        Args:
+            summary_requests: Dicts with 'patient_data', 'medical_context' and optional 'query_type'
+        
+        Returns:
+            One summary per request, in the same order
+        
+        Async callers must await generate_enhanced_summaries instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.generate_enhanced_summaries(summary_requests))
+        raise RuntimeError(
+            "generate_enhanced_summary_batch cannot run inside an event loop; "
+            "await generate_enhanced_summaries instead"
+        )
+    
+    async def generate_enhanced_summaries(self, summary_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate several enhanced summaries concurrently from async code.
+        
+        Runs all requests on one async client, at most _OPENAI_CONCURRENCY at a time.
+        
+        Args:
+            summary_requests: Dicts with 'patient_data', 'medical_context' and optional 'query_type'
+        
+        Returns:
+            One summary per request, in the same order
+        """
+        if not summary_requests:
+            return []
+        
+        if not self.openai_api_key:
+            return [self._generate_fallback_summary(request['patient_data']) for request in summary_requests]
+        
+        # The client's connection pool is bound to this event loop, so it lives for one batch
+        client = openai.AsyncOpenAI(api_key=self.openai_api_key, max_retries=_OPENAI_MAX_RETRIES)
+        semaphore = asyncio.Semaphore(_OPENAI_CONCURRENCY)
+        try:
+            return await asyncio.gather(*(
+                self._generate_enhanced_summary_async(client, semaphore, request)
+                for request in summary_requests
+            ))
+        finally:
+            await client.close()
+    
+    async def _generate_enhanced_summary_async(
+        self,
+        client: "openai.AsyncOpenAI",
+        semaphore: asyncio.Semaphore,
+        request: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Generate one summary for generate_enhanced_summaries."""
+        patient_data = request['patient_data']
+        medical_context = request.get('medical_context', [])
+        query_type = request.get('query_type', 'general')
+        
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model="gpt-4",
+                    messages=self._build_messages(patient_data, medical_context, query_type),
+                    max_tokens=2000,
+                    temperature=0.3
+                )
+            
+            ai_summary = response.choices[0].message.content
+            return self._parse_ai_response(ai_summary, patient_data, medical_context)
+            
+        except Exception as e:
+            self.logger.error(f"Error generating enhanced summary: {str(e)}")
+            return self._generate_fallback_summary(patient_data)
+    
+    def _build_messages(
+        self,
+        patient_data: Dict[str, Any],
+        medical_context: List[Dict[str, Any]],
+        query_type: str
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages for a summary request."""
+        # Prepare context for OpenAI
+        context_text = self._prepare_context_text(medical_context)
+        
+        # Build enhanced prompt with medical context
+        enhanced_prompt = self._build_enhanced_prompt(
+            patient_data, 
+            context_text, 
+            query_type
+        )
+        
+        return [
+            {
+                "role": "system",
+                "content": self._get_system_prompt(query_type)
+            },
+            {
+                "role": "user",
+                "content": enhanced_prompt
+            }
+        ]
+    
     def _extract_medical_concepts(self, patient_data: Dict[str, Any]) -> List[str]:
         """Extract key medical concepts from patient data."""
         concepts = []
@@ -179,8 +416,14 @@ class RAGMedicalService:
         if not medical_context:
             return "No specific medical context available."
         
+        # Stable chunk order keeps identical retrievals byte-identical for prompt caching
+        ordered_context = sorted(
+            medical_context,
+            key=lambda chunk: str(chunk.get('metadata', {}).get('chunk_id', ''))
+        )
+        
         context_parts = []
-        for chunk in medical_context:
+        for chunk in ordered_context:
             if 'content' in chunk:
                 context_parts.append(f"- {chunk['content']}")
             elif 'text' in chunk:
@@ -194,17 +437,15 @@ class RAGMedicalService:
         context_text: str, 
         query_type: str
     ) -> str:
-        """Build enhanced prompt with medical context."""
+        """Build enhanced prompt with medical context.
+        
+        Static instructions come first and patient data last, so repeated calls
+        share the longest possible prefix for provider-side prompt caching.
+        """
         prompt = f"""
         You are a medical AI assistant analyzing a pregnant patient's health data. 
         Use the provided medical context to enhance your analysis.
 
-        MEDICAL CONTEXT:
-        {context_text}
-
-        PATIENT DATA:
-        {json.dumps(patient_data, indent=2, default=str)}
-
         Please provide a comprehensive medical summary including:
         1. Overall health assessment
         2. Pregnancy-specific insights
@@ -215,9 +456,23 @@ class RAGMedicalService:
 
         Focus on evidence-based medical recommendations and consider the patient's 
         pregnancy stage and specific health conditions.
+
+        MEDICAL CONTEXT:
+        {context_text}
+
+        PATIENT DATA:
+        {self._serialize_patient_data(patient_data)}
         """
         return prompt
     
+    def _serialize_patient_data(self, patient_data: Dict[str, Any]) -> str:
+        """Pretty-print patient data as key-sorted JSON so the prompt text is byte-stable."""
+        # Normalized once up front, so neither serializer needs a per-node fallback
+        patient_data = _canonicalize(patient_data)
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(patient_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2).decode()
+        return json.dumps(patient_data, indent=2, sort_keys=True)
+    
     def _get_system_prompt(self, query_type: str) -> str:
         """Get system prompt based on query type."""
         base_prompt = """
@@ -279,7 +534,12 @@ class RAGMedicalService:
     def add_medical_knowledge(self, knowledge_chunks: List[Dict[str, Any]]) -> bool:
         """Add new medical knowledge chunks to the vector database."""
         try:
-            return self.vector_db.add_chunks(knowledge_chunks)
+            added = self.vector_db.add_chunks(knowledge_chunks)
+            if added:
+                # New knowledge can change what any cached query retrieves
+                for semantic_cache in list(self._semantic_caches.values()):
+                    semantic_cache.clear()
+            return added
         except Exception as e:
             self.logger.error(f"Error adding medical knowledge: {str(e)}")
             return False
@@ -4,14 +4,18 @@ Scheduler Service - Background task scheduler for appointment reminders
 
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
+from pymongo import UpdateOne
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 logger = logging.getLogger(__name__)
 
+# Concurrent SMTP sessions used for large reminder batches
+_REMINDER_SEND_WORKERS = int(os.environ.get('REMINDER_SEND_WORKERS', 4))
+
 
 class SchedulerService:
     """Service for scheduling background tasks"""
@@ -85,16 +89,39 @@ class SchedulerService:
             
             logger.info(f"Found {len(appointments)} upcoming appointments")
             
-            # Send reminders for each appointment
+            # Collect appointments that still need a reminder
+            pending = []
             for appointment in appointments:
-                try:
-                    result = self.send_reminders_for_appointment(appointment)
-                    if result.get('success'):
-                        logger.info(f"Reminder sent for appointment {appointment.get('appointment_id')}")
-                    else:
-                        logger.error(f"Failed to send reminder: {result.get('error')}")
-                except Exception as e:
-                    logger.error(f"Error processing appointment: {str(e)}")
+                if appointment.get('reminder_sent'):
+                    logger.info(f"Reminder already sent for appointment {appointment.get('appointment_id')}")
+                    continue
+                
+                details = self._get_reminder_details(appointment)
+                if details is None:
+                    logger.error("Failed to send reminder: Missing required appointment details")
+                    continue
+                
+                pending.append((appointment, details))
+            
+            if not pending:
+                return
+            
+            # Send reminders in batches, spreading large ticks over parallel SMTP sessions
+            results = self.reminder_service.send_appointment_reminder_emails(
+                [details for _, details in pending],
+                max_workers=_REMINDER_SEND_WORKERS
+            )
+            
+            sent = []
+            for (appointment, _), result in zip(pending, results):
+                if result.get('success'):
+                    sent.append((appointment.get('patient_id'), appointment.get('appointment_id')))
+                    logger.info(f"Reminder sent for appointment {appointment.get('appointment_id')}")
+                else:
+                    logger.error(f"Failed to send reminder: {result.get('error')}")
+            
+            # Record every sent reminder in one round trip
+            self._mark_reminders_sent(sent)
             
         except Exception as e:
             logger.error(f"Error checking upcoming appointments: {str(e)}")
@@ -110,18 +137,12 @@ class SchedulerService:
             dict: Result of reminder sending
         """
         try:
-            # Extract appointment details
-            patient_email = appointment.get('patient_email')
-            patient_name = appointment.get('patient_name')
-            doctor_name = appointment.get('doctor_name', 'Your Doctor')
-            appointment_date = appointment.get('appointment_date')
-            appointment_time = appointment.get('appointment_time')
-            appointment_type = appointment.get('appointment_type', 'Consultation')
             patient_id = appointment.get('patient_id')
             appointment_id = appointment.get('appointment_id')
             
-            # Validate required fields
-            if not all([patient_email, patient_name, appointment_date, appointment_time]):
+            # Extract and validate appointment details
+            details = self._get_reminder_details(appointment)
+            if details is None:
                 return {
                     'success': False,
                     'error': 'Missing required appointment details'
@@ -136,14 +157,7 @@ class SchedulerService:
                 }
             
             # Send reminder email
-            result = self.reminder_service.send_appointment_reminder_email(
-                patient_email=patient_email,
-                patient_name=patient_name,
-                doctor_name=doctor_name,
-                appointment_date=appointment_date,
-                appointment_time=appointment_time,
-                appointment_type=appointment_type
-            )
+            result = self.reminder_service.send_appointment_reminder_email(**details)
             
             # Update appointment to mark reminder as sent
             if result.get('success'):
@@ -158,6 +172,29 @@ class SchedulerService:
                 'error': str(e)
             }
     
+    def _get_reminder_details(self, appointment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Extract reminder email fields from an appointment
+        
+        Returns:
+            dict: Keyword arguments for the reminder email, or None if a
+            required field is missing
+        """
+        details = {
+            'patient_email': appointment.get('patient_email'),
+            'patient_name': appointment.get('patient_name'),
+            'doctor_name': appointment.get('doctor_name', 'Your Doctor'),
+            'appointment_date': appointment.get('appointment_date'),
+            'appointment_time': appointment.get('appointment_time'),
+            'appointment_type': appointment.get('appointment_type', 'Consultation')
+        }
+        
+        required = ('patient_email', 'patient_name', 'appointment_date', 'appointment_time')
+        if not all(details[field] for field in required):
+            return None
+        
+        return details
+    
     def _mark_reminder_sent(self, patient_id: str, appointment_id: str):
         """
         Mark appointment reminder as sent in database
@@ -169,16 +206,7 @@ class SchedulerService:
         try:
             # Update the appointment in the patient's appointments array
             result = self.db.db['Patient_test'].update_one(
-                {
-                    'patient_id': patient_id,
-                    'appointments.appointment_id': appointment_id
-                },
-                {
-                    '$set': {
-                        'appointments.$.reminder_sent': True,
-                        'appointments.$.reminder_sent_at': datetime.utcnow().isoformat()
-                    }
-                }
+                *self._reminder_sent_update(patient_id, appointment_id, datetime.utcnow().isoformat())
             )
             
             if result.modified_count > 0:
@@ -188,4 +216,43 @@ class SchedulerService:
                 
         except Exception as e:
             logger.error(f"Error marking reminder as sent: {str(e)}")
-
+    
+    def _mark_reminders_sent(self, sent: List[Tuple[str, str]]):
+        """
+        Mark several appointment reminders as sent with a single bulk write
+        
+        Args:
+            sent: (patient_id, appointment_id) pairs
+        """
+        if not sent:
+            return
+        
+        try:
+            sent_at = datetime.utcnow().isoformat()
+            result = self.db.db['Patient_test'].bulk_write(
+                [UpdateOne(*self._reminder_sent_update(patient_id, appointment_id, sent_at))
+                 for patient_id, appointment_id in sent],
+                ordered=False
+            )
+            
+            logger.info(f"Marked {result.modified_count}/{len(sent)} reminders as sent")
+            if result.modified_count < len(sent):
+                logger.warning(f"Could not update reminder status for {len(sent) - result.modified_count} appointments")
+                
+        except Exception as e:
+            logger.error(f"Error marking reminders as sent: {str(e)}")
+    
+    def _reminder_sent_update(self, patient_id: str, appointment_id: str, sent_at: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Filter and update that flag one appointment's reminder as sent"""
+        return (
+            {
+                'patient_id': patient_id,
+                'appointments.appointment_id': appointment_id
+            },
+            {
+                '$set': {
+                    'appointments.$.reminder_sent': True,
+                    'appointments.$.reminder_sent_at': sent_at
+                }
+            }
+        )
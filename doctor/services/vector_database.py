@@ -1,11 +1,13 @@
 import os
 import json
+import pickle
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import logging
-import pickle
 import hashlib
+import threading
+from functools import lru_cache
 
 # Lazy import for sentence_transformers to avoid DLL issues
 SentenceTransformer = None
@@ -27,6 +29,55 @@ def _lazy_import_sentence_transformers():
             print(f"[WARN] SentenceTransformers DLL error (PyTorch issue): {e}")
     return SentenceTransformer
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except (ImportError, OSError):
+    faiss = None
+    FAISS_AVAILABLE = False
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @numba.njit(parallel=True, fastmath=True)
+    def _dot_rows(matrix, query):
+        """Dot product of every row with query, parallel over rows."""
+        out = np.empty(matrix.shape[0], dtype=np.float32)
+        for i in numba.prange(matrix.shape[0]):
+            total = np.float32(0.0)
+            for j in range(matrix.shape[1]):
+                total += matrix[i, j] * query[j]
+            out[i] = total
+        return out
+
+# HNSW graph degree; 32 is the usual recall/memory trade-off for small dims
+_HNSW_NEIGHBORS = 32
+
+# Texts per forward pass when embedding chunks
+_ENCODE_BATCH_SIZE = 64
+
+# Distinct query strings whose embeddings are kept in memory
+_QUERY_CACHE_SIZE = 2048
+
+# Store ANN index vectors as 8-bit scalar-quantized codes (4x smaller than float32)
+_QUANTIZE_INT8 = os.getenv('VECTOR_DB_INT8', 'false').lower() == 'true'
+
+# Minimum HNSW search breadth for type-filtered queries, which skip non-matching nodes
+_FILTERED_EF_SEARCH = 64
+
+# Rows scored per block in the brute-force scan (4096 x 384 float32 = 6 MB)
+_SCAN_TILE_ROWS = 4096
+
 class VectorDatabase:
     """
     Simple vector database implementation for medical knowledge chunks.
@@ -36,10 +87,21 @@ class VectorDatabase:
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
         self.model_name = model_name
         self.model = None
-        self.embeddings = []
+        # Unit-length float32 rows; capacity grows by doubling, first _emb_count rows are live
+        self._emb_matrix = np.empty((0, 0), dtype=np.float32)
+        self._emb_count = 0
         self.chunks = []
         self.metadata = []
+        # Lowercased metadata type -> int64 positions of matching chunks
+        self._ids_by_type: Dict[str, np.ndarray] = {}
+        # Content hashes of stored chunks, so re-ingested content is not re-embedded
+        self._chunk_ids: set = set()
+        self.index = None
+        # The instance is shared process-wide; guards every read and write of the stored
+        # rows, chunks, metadata, type positions and index so searches see consistent state
+        self._lock = threading.RLock()
         self.logger = logging.getLogger(__name__)
+        self._embed_query = lru_cache(maxsize=_QUERY_CACHE_SIZE)(self._encode_query)
         
         # Initialize the embedding model
         self._initialize_model()
@@ -61,6 +123,38 @@ class VectorDatabase:
             self.model = None
             self.logger.warning("SentenceTransformers not available - embedding model not initialized")
     
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Live (N, D) float32 embedding rows, L2-normalized. Read-only view."""
+        return self._emb_matrix[:self._emb_count]
+    
+    def _append_embeddings(self, block: np.ndarray):
+        """Normalize and append a (k, D) block, growing storage geometrically."""
+        block = self._normalize_rows(block)
+        needed = self._emb_count + len(block)
+        if needed > len(self._emb_matrix) or self._emb_matrix.shape[1] != block.shape[1]:
+            capacity = max(needed, 2 * len(self._emb_matrix), 64)
+            grown = np.empty((capacity, block.shape[1]), dtype=np.float32)
+            if self._emb_count:
+                grown[:self._emb_count] = self.embeddings
+            self._emb_matrix = grown
+        self._emb_matrix[self._emb_count:needed] = block
+        self._emb_count = needed
+    
+    def _reset_embeddings(self):
+        """Drop all stored embeddings."""
+        self._emb_matrix = np.empty((0, 0), dtype=np.float32)
+        self._emb_count = 0
+    
+    @staticmethod
+    def _normalize_rows(matrix) -> np.ndarray:
+        """Return matrix as contiguous float32 with unit-length rows."""
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-8)
+    
     def add_chunks(self, chunks: List[Dict[str, Any]]) -> bool:
         """
         Add medical knowledge chunks to the vector database.
@@ -76,32 +170,71 @@ class VectorDatabase:
                 self.logger.error("Embedding model not initialized")
                 return False
             
-            new_embeddings = []
             new_chunks = []
             new_metadata = []
+            added_at = datetime.utcnow().isoformat()
+            new_ids = []
+            duplicates = 0
             
+            with self._lock:
+                stored_ids = set(self._chunk_ids)
             for chunk in chunks:
                 if 'content' not in chunk:
                     continue
                 
-                # Generate embedding
-                embedding = self.model.encode(chunk['content'])
-                new_embeddings.append(embedding)
+                # Skip content that is already stored or repeated in this batch
+                chunk_id = self._generate_chunk_id(chunk['content'])
+                if chunk_id in stored_ids:
+                    duplicates += 1
+                    continue
+                stored_ids.add(chunk_id)
+                new_ids.append(chunk_id)
                 
                 # Store chunk and metadata
                 new_chunks.append(chunk['content'])
                 metadata = chunk.get('metadata', {})
-                metadata['chunk_id'] = self._generate_chunk_id(chunk['content'])
-                metadata['added_at'] = datetime.utcnow().isoformat()
+                metadata['chunk_id'] = chunk_id
+                metadata['added_at'] = added_at
                 new_metadata.append(metadata)
             
-            # Add to existing data
-            self.embeddings.extend(new_embeddings)
-            self.chunks.extend(new_chunks)
-            self.metadata.extend(new_metadata)
+            if duplicates:
+                self.logger.info(f"Skipped {duplicates} duplicate medical knowledge chunks")
+            if not new_chunks:
+                return True
             
-            # Save updated data
-            self._save_data()
+            # Generate all embeddings in batched forward passes
+            new_embeddings = self.model.encode(
+                new_chunks,
+                batch_size=_ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            
+            # Encoding ran unlocked; drop anything another caller stored in the meantime
+            with self._lock:
+                keep = [i for i, chunk_id in enumerate(new_ids) if chunk_id not in self._chunk_ids]
+                if not keep:
+                    return True
+                if len(keep) < len(new_ids):
+                    new_embeddings = np.asarray(new_embeddings)[keep]
+                    new_chunks = [new_chunks[i] for i in keep]
+                    new_metadata = [new_metadata[i] for i in keep]
+                    new_ids = [new_ids[i] for i in keep]
+                
+                # Add to existing data
+                start = self._emb_count
+                self._append_embeddings(new_embeddings)
+                self._add_to_index(self.embeddings[start:])
+                
+                first_new = len(self.metadata)
+                self.chunks.extend(new_chunks)
+                self.metadata.extend(new_metadata)
+                self._index_types(first_new)
+                self._chunk_ids.update(new_ids)
+                
+                # Save updated data; only the new entries are appended to the JSONL files
+                self._save_data(first_new)
             
             self.logger.info(f"Added {len(new_chunks)} medical knowledge chunks")
             return True
@@ -128,36 +261,27 @@ class VectorDatabase:
             List of similar chunks with metadata
         """
         try:
-            if not self.model or not self.embeddings:
+            if not self.model or self._emb_count == 0:
                 return []
             
             # Generate query embedding
-            query_embedding = self.model.encode(query)
-            
-            # Calculate cosine similarities
-            similarities = self._calculate_cosine_similarities(query_embedding, self.embeddings)
+            query_embedding = self._embed_query(query)
             
-            # Get top-k indices
-            top_indices = np.argsort(similarities)[-top_k:][::-1]
-            
-            # Filter by type if specified
-            if filter_type:
-                filtered_indices = []
-                for idx in top_indices:
-                    if (idx < len(self.metadata) and 
-                        self.metadata[idx].get('type', '').lower() == filter_type.lower()):
-                        filtered_indices.append(idx)
-                top_indices = filtered_indices[:top_k]
-            
-            # Prepare results
-            results = []
-            for idx in top_indices:
-                if idx < len(self.chunks) and idx < len(self.metadata):
-                    results.append({
-                        'content': self.chunks[idx],
-                        'metadata': self.metadata[idx],
-                        'similarity_score': float(similarities[idx])
-                    })
+            with self._lock:
+                if self.index is not None:
+                    candidates = self._search_index(query_embedding, top_k, filter_type)
+                else:
+                    candidates = self._search_brute_force(query_embedding, top_k, filter_type)
+                
+                # Prepare results
+                results = []
+                for idx, score in candidates:
+                    if idx < len(self.chunks) and idx < len(self.metadata):
+                        results.append({
+                            'content': self.chunks[idx],
+                            'metadata': self.metadata[idx],
+                            'similarity_score': score
+                        })
             
             return results
             
@@ -165,102 +289,278 @@ class VectorDatabase:
             self.logger.error(f"Error searching chunks: {str(e)}")
             return []
     
-    def _calculate_cosine_similarities(self, query_embedding: np.ndarray, embeddings: List[np.ndarray]) -> np.ndarray:
-        """Calculate cosine similarities between query and all embeddings."""
-        if not embeddings:
-            return np.array([])
+    def embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Return the cached unit-length embedding for a query, or None without a model."""
+        if not self.model:
+            return None
+        return self._embed_query(query)
+    
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Embed a query as a unit-length float32 vector; wrapped in an LRU cache per instance."""
+        embedding = self.model.encode(query, convert_to_numpy=True, normalize_embeddings=True)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding.flags.writeable = False
+        return embedding
+    
+    def _search_index(self, query_embedding: np.ndarray, top_k: int, filter_type: Optional[str]) -> List[Tuple[int, float]]:
+        """Query the ANN index with a unit-length query; returns (position, cosine similarity) best first.
+        
+        A type filter is pushed into the search as an ID selector, so only
+        matching chunks are visited.
+        """
+        query = query_embedding.reshape(1, -1)
+        
+        if filter_type:
+            allowed = self._ids_by_type.get(filter_type.lower())
+            if allowed is None:
+                return []
+            k = min(top_k, len(allowed))
+            params = faiss.SearchParametersHNSW()
+            params.sel = faiss.IDSelectorBatch(len(allowed), faiss.swig_ptr(allowed))
+            params.efSearch = max(_FILTERED_EF_SEARCH, k)
+            scores, ids = self.index.search(query, k, params=params)
+        else:
+            k = min(top_k, self.index.ntotal)
+            if k <= 0:
+                return []
+            scores, ids = self.index.search(query, k)
+        return [(int(idx), float(score)) for idx, score in zip(ids[0], scores[0]) if idx >= 0]
+    
+    def _search_brute_force(self, query_embedding: np.ndarray, top_k: int, filter_type: Optional[str]) -> List[Tuple[int, float]]:
+        """Exact cosine scan used when FAISS is not installed.
         
-        # Convert to numpy array
-        embeddings_array = np.array(embeddings)
+        The type filter is applied before top-k selection, so filtered searches
+        still return up to top_k matches.
+        """
+        positions = None
+        if filter_type:
+            positions = self._ids_by_type.get(filter_type.lower())
+            if positions is None:
+                return []
+        scores = self._calculate_cosine_similarities(query_embedding, self.embeddings, positions)
+        if positions is None:
+            positions = np.arange(len(scores))
         
-        # Calculate cosine similarities
-        query_norm = np.linalg.norm(query_embedding)
-        embeddings_norm = np.linalg.norm(embeddings_array, axis=1)
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
         
-        # Avoid division by zero
-        query_norm = max(query_norm, 1e-8)
-        embeddings_norm = np.maximum(embeddings_norm, 1e-8)
+        # O(N) partition for the top k, then sort only those k
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(positions[i]), float(scores[i])) for i in top]
+    
+    def _index_types(self, start: int = 0):
+        """Add metadata rows from start onward to the per-type position arrays."""
+        new_ids: Dict[str, List[int]] = {}
+        for position in range(start, min(len(self.metadata), self._emb_count)):
+            chunk_type = self.metadata[position].get('type', '').lower()
+            new_ids.setdefault(chunk_type, []).append(position)
         
-        similarities = np.dot(embeddings_array, query_embedding) / (query_norm * embeddings_norm)
+        for chunk_type, positions in new_ids.items():
+            positions = np.asarray(positions, dtype=np.int64)
+            existing = self._ids_by_type.get(chunk_type)
+            if existing is not None:
+                positions = np.concatenate([existing, positions])
+            self._ids_by_type[chunk_type] = positions
+    
+    def _build_index(self):
+        """(Re)build the HNSW inner-product index from all stored embeddings."""
+        self.index = None
+        if not FAISS_AVAILABLE or self._emb_count == 0:
+            return
+        
+        dim = self.embeddings.shape[1]
+        vectors = np.ascontiguousarray(self.embeddings)
+        if _QUANTIZE_INT8:
+            # Per-dimension 8-bit ranges are trained on the current vectors at each rebuild
+            self.index = faiss.IndexHNSWSQ(
+                dim, faiss.ScalarQuantizer.QT_8bit, _HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT
+            )
+            self.index.train(vectors)
+        else:
+            self.index = faiss.IndexHNSWFlat(dim, _HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        self.index.add(vectors)
+    
+    def _add_to_index(self, embeddings: np.ndarray):
+        """Add already-normalized rows to the ANN index, so inner product is cosine."""
+        if not FAISS_AVAILABLE or len(embeddings) == 0:
+            return
+        if self.index is None:
+            self._build_index()
+            return
         
+        self.index.add(np.ascontiguousarray(embeddings))
+    
+    def _calculate_cosine_similarities(
+        self,
+        query_embedding: np.ndarray,
+        embeddings: np.ndarray,
+        rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Cosine similarities of the query against embeddings (or only the given rows).
+        
+        Both sides are unit length (rows normalized on insert, queries by the
+        encoder), so no norms are computed per query. Rows are scored in
+        _SCAN_TILE_ROWS blocks that stay cache-resident, and unselected rows
+        are never read.
+        """
+        count = len(embeddings) if rows is None else len(rows)
+        if count == 0:
+            return np.array([])
+        
+        query = np.ascontiguousarray(query_embedding, dtype=np.float32)
+        similarities = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _SCAN_TILE_ROWS):
+            stop = start + _SCAN_TILE_ROWS
+            tile = embeddings[start:stop] if rows is None else embeddings[rows[start:stop]]
+            similarities[start:stop] = _dot_rows(tile, query) if NUMBA_AVAILABLE else tile @ query
         return similarities
     
     def _generate_chunk_id(self, content: str) -> str:
-        """Generate a unique ID for a chunk based on its content."""
-        return hashlib.md5(content.encode()).hexdigest()[:16]
+        """Generate a unique ID for a chunk based on its content (16 hex chars)."""
+        return hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
     
-    def _save_data(self):
-        """Save embeddings and metadata to disk."""
+    def _save_data(self, first_new: int = 0):
+        """
+        Save embeddings and metadata to disk.
+        
+        Chunks and metadata are stored one JSON document per line. Entries from
+        first_new onward are appended; first_new=0 rewrites (compacts) the files.
+        """
         try:
             data_dir = "data/vector_db"
             os.makedirs(data_dir, exist_ok=True)
             
-            # Save embeddings
-            with open(f"{data_dir}/embeddings.pkl", "wb") as f:
-                pickle.dump(self.embeddings, f)
+            # Save embeddings; written to a temp file and swapped in so a live memmap of
+            # the previous file is never truncated underneath us
+            embeddings_path = f"{data_dir}/embeddings.npy"
+            with open(f"{embeddings_path}.tmp", "wb") as f:
+                np.save(f, self.embeddings)
+            os.replace(f"{embeddings_path}.tmp", embeddings_path)
             
             # Save chunks and metadata
-            with open(f"{data_dir}/chunks.json", "w") as f:
-                json.dump(self.chunks, f, indent=2)
+            mode = "ab" if first_new else "wb"
+            with open(f"{data_dir}/chunks.jsonl", mode) as f:
+                f.writelines(self._dumps_line(chunk) for chunk in self.chunks[first_new:])
             
-            with open(f"{data_dir}/metadata.json", "w") as f:
-                json.dump(self.metadata, f, indent=2)
+            with open(f"{data_dir}/metadata.jsonl", mode) as f:
+                f.writelines(self._dumps_line(metadata) for metadata in self.metadata[first_new:])
             
             self.logger.info("Vector database data saved successfully")
             
         except Exception as e:
             self.logger.error(f"Error saving vector database data: {str(e)}")
     
+    @staticmethod
+    def _dumps_line(data: Any) -> bytes:
+        """Serialize to one newline-terminated JSON line, using orjson when installed."""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(data).encode("utf-8") + b"\n"
+    
+    @staticmethod
+    def _load_lines(path: str) -> List[Any]:
+        """Parse a JSONL file, using orjson when installed."""
+        loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+        with open(path, "rb") as f:
+            return [loads(line) for line in f if line.strip()]
+    
     def _load_data(self):
         """Load embeddings and metadata from disk."""
         try:
             data_dir = "data/vector_db"
             
-            # Load embeddings
-            if os.path.exists(f"{data_dir}/embeddings.pkl"):
-                with open(f"{data_dir}/embeddings.pkl", "rb") as f:
-                    self.embeddings = pickle.load(f)
+            if not os.path.exists(f"{data_dir}/chunks.jsonl") and os.path.exists(f"{data_dir}/chunks.json"):
+                self._migrate_legacy_data(data_dir)
+            
+            # Memory-map embeddings; pages are read lazily and shared across workers.
+            # Rows were normalized before saving, and the first append copies to RAM.
+            if os.path.exists(f"{data_dir}/embeddings.npy"):
+                self._emb_matrix = np.load(f"{data_dir}/embeddings.npy", mmap_mode="r")
+                self._emb_count = len(self._emb_matrix)
             
             # Load chunks
-            if os.path.exists(f"{data_dir}/chunks.json"):
-                with open(f"{data_dir}/chunks.json", "r") as f:
-                    self.chunks = json.load(f)
+            if os.path.exists(f"{data_dir}/chunks.jsonl"):
+                self.chunks = self._load_lines(f"{data_dir}/chunks.jsonl")
             
             # Load metadata
-            if os.path.exists(f"{data_dir}/metadata.json"):
-                with open(f"{data_dir}/metadata.json", "r") as f:
-                    self.metadata = json.load(f)
+            if os.path.exists(f"{data_dir}/metadata.jsonl"):
+                self.metadata = self._load_lines(f"{data_dir}/metadata.jsonl")
+            
+            self._ids_by_type = {}
+            self._index_types()
+            # Rehash stored content; ids saved by older versions used a different hash
+            self._chunk_ids = {self._generate_chunk_id(chunk) for chunk in self.chunks}
+            self._build_index()
             
             self.logger.info(f"Loaded {len(self.chunks)} medical knowledge chunks")
             
         except Exception as e:
             self.logger.error(f"Error loading vector database data: {str(e)}")
-            self.embeddings = []
+            self._reset_embeddings()
             self.chunks = []
             self.metadata = []
+            self._ids_by_type = {}
+            self._chunk_ids = set()
+            self.index = None
+    
+    def _migrate_legacy_data(self, data_dir: str):
+        """Rewrite embeddings.pkl / chunks.json / metadata.json in the current file formats."""
+        self.logger.warning("Found legacy vector database files; converting to .npy/.jsonl")
+        
+        embeddings = []
+        if os.path.exists(f"{data_dir}/embeddings.pkl"):
+            with open(f"{data_dir}/embeddings.pkl", "rb") as f:
+                embeddings = pickle.load(f)
+        with open(f"{data_dir}/chunks.json", "rb") as f:
+            self.chunks = json.load(f)
+        if os.path.exists(f"{data_dir}/metadata.json"):
+            with open(f"{data_dir}/metadata.json", "rb") as f:
+                self.metadata = json.load(f)
+        
+        # Legacy rows were stored unnormalized
+        self._reset_embeddings()
+        if len(embeddings):
+            self._append_embeddings(np.asarray(embeddings, dtype=np.float32))
+        self._save_data()
+        self.logger.info(f"Converted {len(self.chunks)} legacy medical knowledge chunks")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector database."""
+        with self._lock:
+            total_chunks = len(self.chunks)
         return {
-            "total_chunks": len(self.chunks),
+            "total_chunks": total_chunks,
             "model_name": self.model_name,
             "last_updated": datetime.utcnow().isoformat(),
-            "data_loaded": len(self.chunks) > 0
+            "data_loaded": total_chunks > 0,
+            "index_type": self._index_type()
         }
     
+    def _index_type(self) -> str:
+        """Describe the search backend in use."""
+        if self.index is None:
+            return "brute_force"
+        return "faiss_hnsw_sq8" if _QUANTIZE_INT8 else "faiss_hnsw"
+    
     def clear_data(self) -> bool:
         """Clear all data from the vector database."""
         try:
-            self.embeddings = []
-            self.chunks = []
-            self.metadata = []
-            
-            # Remove saved files
-            data_dir = "data/vector_db"
-            for filename in ["embeddings.pkl", "chunks.json", "metadata.json"]:
-                filepath = f"{data_dir}/{filename}"
-                if os.path.exists(filepath):
-                    os.remove(filepath)
+            with self._lock:
+                self._reset_embeddings()
+                self.chunks = []
+                self.metadata = []
+                self._ids_by_type = {}
+                self._chunk_ids = set()
+                self.index = None
+                
+                # Remove saved files
+                data_dir = "data/vector_db"
+                for filename in ["embeddings.npy", "chunks.jsonl", "metadata.jsonl"]:
+                    filepath = f"{data_dir}/{filename}"
+                    if os.path.exists(filepath):
+                        os.remove(filepath)
             
             self.logger.info("Vector database cleared successfully")
             return True
@@ -268,3 +568,18 @@ class VectorDatabase:
         except Exception as e:
             self.logger.error(f"Error clearing vector database: {str(e)}")
             return False
+
+
+# Process-wide instance; loading the embedding model is too costly to repeat per request
+_instance: Optional[VectorDatabase] = None
+_instance_lock = threading.Lock()
+
+
+def get_vector_db() -> VectorDatabase:
+    """Get the shared VectorDatabase instance, creating it on first use"""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = VectorDatabase()
+    return _instance
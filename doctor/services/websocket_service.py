@@ -3,84 +3,203 @@
 WebSocket Service - Handles WebSocket connections for real-time voice communication
 """
 
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, Iterable, List, Set, Union
+from collections import defaultdict
+import os
 import json
+import zlib
+import time
 import asyncio
+import heapq
+import itertools
+import logging
 from datetime import datetime
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Errors a send can raise once the peer is gone; anything else is a bug and propagates
+_SEND_ERRORS = [RuntimeError, OSError]
+try:
+    from websockets.exceptions import ConnectionClosed
+    _SEND_ERRORS.append(ConnectionClosed)
+except ImportError:
+    pass
+try:
+    from starlette.websockets import WebSocketDisconnect, WebSocketState
+    _SEND_ERRORS.append(WebSocketDisconnect)
+except ImportError:
+    WebSocketState = None
+_SEND_ERRORS = tuple(_SEND_ERRORS)
+
+
+def _is_closed(websocket) -> bool:
+    """True when a Starlette socket already reports it is not connected"""
+    # A state check is far cheaper than raising and catching a send error per dead client
+    if WebSocketState is None:
+        return False
+    state = getattr(websocket, "client_state", None)
+    return state is not None and state != WebSocketState.CONNECTED
+
+# Messages buffered per connection; a client this far behind is dropped as too slow
+_SEND_QUEUE_SIZE = 128
+
+# Opt-in: deflate large broadcasts once and send the same binary frame to every
+# client, instead of each socket compressing it again. Clients must inflate them.
+_COMPRESS_BROADCASTS = os.getenv('WEBSOCKET_COMPRESS_BROADCASTS', 'false').lower() == 'true'
+_COMPRESS_MIN_BYTES = 512
+
+# Initial capacity of the per-connection activity array; it doubles when full
+_INITIAL_SLOTS = 64
+
+
+def _encode_message(message: Dict[str, Any]) -> str:
+    """Serialize a message once into the compact JSON text sent to every socket"""
+    if ORJSON_AVAILABLE:
+        # json.dumps accepts int keys (e.g. ids); orjson needs the option to match
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message, separators=(",", ":"))
+
 
 class WebSocketService:
     """Service for managing WebSocket connections"""
     
+    # Seconds a connection's writer waits on one send before treating the socket as dead
+    BROADCAST_SEND_TIMEOUT = 5.0
+    
     def __init__(self):
-        self.active_connections: Set[Any] = set()
-        self.conversation_connections: Dict[int, Set[Any]] = {}
+        self.conversation_connections: Dict[int, Set[Any]] = defaultdict(set)
+        # Keys are the active connections; there is no separate set to keep in sync
         self.connection_data: Dict[Any, Dict[str, Any]] = {}
+        # Hot per-connection state kept as parallel arrays indexed by connection_data[ws]["slot"],
+        # so recording activity is a single array write instead of a dict update
+        self._sockets: List[Any] = []
+        self._last_activity = np.empty(_INITIAL_SLOTS, dtype=np.float64)
+        # One (activity time, seq, websocket) entry per connection, keyed by the activity time
+        # when it was pushed. Activity only moves forward, so the key is a lower bound: cleanup
+        # re-pushes entries whose connection has been active since instead of dropping them.
+        self._expiry_heap: List[tuple] = []
+        self._expiry_seq = itertools.count()
     
     def add_connection(self, websocket, conversation_id: int = None):
         """Add a new WebSocket connection"""
         try:
-            self.active_connections.add(websocket)
+            # Store connection metadata; connected_at is wall-clock epoch seconds,
+            # last activity is time.monotonic() so inactivity checks are a float compare
+            now = time.monotonic()
+            data = self.connection_data.get(websocket)
+            if data is None:
+                self.connection_data[websocket] = data = {
+                    "conversation_id": None,
+                    "slot": self._allocate_slot(websocket),
+                    "expiry_seq": self._schedule_expiry(websocket, now)
+                }
+            else:
+                # Re-registered: keep its slot, heap entry, queue and writer, and move
+                # it out of the conversation it was previously in
+                self._leave_conversation(websocket, data["conversation_id"])
             
             if conversation_id:
-                if conversation_id not in self.conversation_connections:
-                    self.conversation_connections[conversation_id] = set()
                 self.conversation_connections[conversation_id].add(websocket)
+            data["conversation_id"] = conversation_id
+            data["connected_at"] = time.time()
+            self._touch(data["slot"], now)
             
-            # Store connection metadata
-            self.connection_data[websocket] = {
-                "conversation_id": conversation_id,
-                "connected_at": datetime.now().isoformat(),
-                "last_activity": datetime.now().isoformat()
-            }
-            
-            print(f"WebSocket connection added. Total connections: {len(self.active_connections)}")
+            logger.debug("WebSocket connection added. Total connections: %d", len(self.connection_data))
             
         except Exception as e:
-            print(f"Error adding WebSocket connection: {e}")
+            logger.exception("Error adding WebSocket connection: %s", e)
     
     def remove_connection(self, websocket):
         """Remove a WebSocket connection"""
         try:
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
-            
             # Remove from conversation connections
-            if websocket in self.connection_data:
-                conversation_id = self.connection_data[websocket].get("conversation_id")
-                if conversation_id and conversation_id in self.conversation_connections:
-                    self.conversation_connections[conversation_id].discard(websocket)
-                    if not self.conversation_connections[conversation_id]:
-                        del self.conversation_connections[conversation_id]
+            data = self.connection_data.pop(websocket, None)
+            if data is not None:
+                self._leave_conversation(websocket, data.get("conversation_id"))
                 
-                del self.connection_data[websocket]
+                self._release_slot(data["slot"])
+                
+                writer = data.get("writer")
+                if writer is not None:
+                    writer.cancel()
             
-            print(f"WebSocket connection removed. Total connections: {len(self.active_connections)}")
+            logger.debug("WebSocket connection removed. Total connections: %d", len(self.connection_data))
             
         except Exception as e:
-            print(f"Error removing WebSocket connection: {e}")
+            logger.exception("Error removing WebSocket connection: %s", e)
+    
+    def _leave_conversation(self, websocket, conversation_id):
+        """Drop a socket from a conversation's set, deleting the set once empty"""
+        connections = self.conversation_connections.get(conversation_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.conversation_connections[conversation_id]
+    
+    def _allocate_slot(self, websocket) -> int:
+        """Append a socket to the parallel arrays, growing them by doubling"""
+        slot = len(self._sockets)
+        if slot == len(self._last_activity):
+            grown = np.empty(slot * 2, dtype=np.float64)
+            grown[:slot] = self._last_activity
+            self._last_activity = grown
+        self._sockets.append(websocket)
+        return slot
+    
+    def _release_slot(self, slot: int):
+        """Free a slot by moving the last socket into it"""
+        last = len(self._sockets) - 1
+        if slot != last:
+            moved = self._sockets[last]
+            self._sockets[slot] = moved
+            self._last_activity[slot] = self._last_activity[last]
+            self.connection_data[moved]["slot"] = slot
+        self._sockets.pop()
+    
+    def _touch(self, slot: int, now: float):
+        """Record activity for a connection; the expiry heap is corrected lazily by cleanup"""
+        self._last_activity[slot] = now
+    
+    def _schedule_expiry(self, websocket, last_activity: float) -> int:
+        """Push a connection's expiry heap entry and return its sequence number"""
+        seq = next(self._expiry_seq)
+        heapq.heappush(self._expiry_heap, (last_activity, seq, websocket))
+        return seq
     
     def get_connection_count(self) -> int:
         """Get total number of active connections"""
-        return len(self.active_connections)
+        return len(self.connection_data)
     
     def get_conversation_connection_count(self, conversation_id: int) -> int:
         """Get number of connections for a specific conversation"""
-        return len(self.conversation_connections.get(conversation_id, set()))
+        return len(self.conversation_connections.get(conversation_id, ()))
     
     def get_connection_info(self) -> Dict[str, Any]:
         """Get information about all connections"""
         try:
-            connections_info = []
+            # Map monotonic activity times back onto the wall clock for display, all at once
+            wall_offset = time.time() - time.monotonic()
+            last_activity = (self._last_activity[:len(self._sockets)] + wall_offset).tolist()
+            fromtimestamp = datetime.fromtimestamp
             
-            for websocket, data in self.connection_data.items():
-                connections_info.append({
-                    "conversation_id": data.get("conversation_id"),
-                    "connected_at": data.get("connected_at"),
-                    "last_activity": data.get("last_activity")
-                })
+            connections_info = [
+                {
+                    "conversation_id": data["conversation_id"],
+                    "connected_at": fromtimestamp(data["connected_at"]).isoformat(),
+                    "last_activity": fromtimestamp(last_activity[data["slot"]]).isoformat()
+                }
+                for data in self.connection_data.values()
+            ]
             
             return {
-                "total_connections": len(self.active_connections),
+                "total_connections": len(self.connection_data),
                 "conversation_connections": {
                     str(conv_id): len(connections) 
                     for conv_id, connections in self.conversation_connections.items()
@@ -89,115 +208,181 @@ class WebSocketService:
             }
             
         except Exception as e:
-            print(f"Error getting connection info: {e}")
+            logger.exception("Error getting connection info: %s", e)
             return {"error": str(e)}
     
     async def broadcast_to_all(self, message: Dict[str, Any]):
         """Broadcast message to all active connections"""
-        try:
-            if not self.active_connections:
-                return
-            
-            message_str = json.dumps(message)
-            disconnected = set()
-            
-            for websocket in self.active_connections:
-                try:
-                    await websocket.send_text(message_str)
-                except Exception as e:
-                    print(f"Error sending message to WebSocket: {e}")
-                    disconnected.add(websocket)
-            
-            # Remove disconnected connections
-            for websocket in disconnected:
-                self.remove_connection(websocket)
-                
-        except Exception as e:
-            print(f"Error broadcasting message: {e}")
+        if not self.connection_data:
+            return
+        
+        await self._broadcast(self.connection_data, message)
     
     async def broadcast_to_conversation(self, conversation_id: int, message: Dict[str, Any]):
         """Broadcast message to all connections in a specific conversation"""
-        try:
-            if conversation_id not in self.conversation_connections:
+        if conversation_id not in self.conversation_connections:
+            return
+        
+        await self._broadcast(self.conversation_connections[conversation_id], message)
+    
+    async def _broadcast(self, websockets: Iterable[Any], message: Dict[str, Any]):
+        """Queue message on each socket's writer, then update activity and drop slow sockets
+        
+        Nothing is awaited per socket: each connection's writer task drains its own
+        queue, so a slow client only backs up itself. Nothing is added or removed
+        while websockets is iterated, so live collections are passed without copying.
+        """
+        payload: Union[str, bytes] = _encode_message(message)
+        if _COMPRESS_BROADCASTS and len(payload) >= _COMPRESS_MIN_BYTES:
+            payload = zlib.compress(payload.encode(), 6)
+        now = time.monotonic()
+        disconnected = []
+        
+        # Bound methods hoisted out of the per-socket loop
+        get_data = self.connection_data.get
+        start_writer = self._start_writer
+        touch = self._touch
+        
+        for websocket in websockets:
+            data = get_data(websocket)
+            if data is None:
+                continue
+            if _is_closed(websocket):
+                disconnected.append(websocket)
+                continue
+            queue = data.get("queue") or start_writer(websocket, data)
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.debug("Dropping WebSocket whose send queue is full")
+                disconnected.append(websocket)
+                continue
+            touch(data["slot"], now)
+        
+        # Remove connections that closed or stopped keeping up
+        for websocket in disconnected:
+            self.remove_connection(websocket)
+    
+    def _start_writer(self, websocket, data: Dict[str, Any]) -> asyncio.Queue:
+        """Create the socket's send queue and the task that drains it"""
+        queue = asyncio.Queue(maxsize=_SEND_QUEUE_SIZE)
+        data["queue"] = queue
+        data["writer"] = asyncio.create_task(self._writer_loop(websocket, queue))
+        return queue
+    
+    async def _writer_loop(self, websocket, queue: asyncio.Queue):
+        """Send queued messages to one socket in order until it fails
+        
+        Text payloads go out as text frames, precompressed bytes as binary frames.
+        """
+        timeout = self.BROADCAST_SEND_TIMEOUT
+        while True:
+            payload = await queue.get()
+            send = websocket.send_bytes if isinstance(payload, bytes) else websocket.send_text
+            try:
+                await asyncio.wait_for(send(payload), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.debug("Timed out sending message to WebSocket")
+                self.remove_connection(websocket)
                 return
-            
-            message_str = json.dumps(message)
-            disconnected = set()
-            
-            for websocket in self.conversation_connections[conversation_id]:
-                try:
-                    await websocket.send_text(message_str)
-                except Exception as e:
-                    print(f"Error sending message to conversation WebSocket: {e}")
-                    disconnected.add(websocket)
-            
-            # Remove disconnected connections
-            for websocket in disconnected:
+            except _SEND_ERRORS as e:
+                logger.debug("Error sending message to WebSocket: %s", e)
                 self.remove_connection(websocket)
-                
-        except Exception as e:
-            print(f"Error broadcasting to conversation: {e}")
+                return
     
-    async def send_to_connection(self, websocket, message: Dict[str, Any]):
-        """Send message to a specific WebSocket connection"""
-        try:
-            message_str = json.dumps(message)
-            await websocket.send_text(message_str)
-            
-            # Update last activity
-            if websocket in self.connection_data:
-                self.connection_data[websocket]["last_activity"] = datetime.now().isoformat()
-                
-        except Exception as e:
-            print(f"Error sending message to specific WebSocket: {e}")
+    async def send_to_connection(self, websocket, message: Dict[str, Any], now: float = None):
+        """Send message to a specific WebSocket connection
+        
+        A connection with a writer gets the message through its queue, so it stays
+        ordered with queued broadcasts; otherwise it is sent directly. Callers sending
+        many messages can pass one precomputed time.monotonic() value.
+        """
+        if _is_closed(websocket):
             self.remove_connection(websocket)
+            return
+        
+        message_str = _encode_message(message)
+        data = self.connection_data.get(websocket)
+        queue = data.get("queue") if data is not None else None
+        if queue is not None:
+            try:
+                queue.put_nowait(message_str)
+            except asyncio.QueueFull:
+                logger.debug("Dropping WebSocket whose send queue is full")
+                self.remove_connection(websocket)
+                return
+        else:
+            try:
+                await websocket.send_text(message_str)
+            except _SEND_ERRORS as e:
+                logger.debug("Error sending message to specific WebSocket: %s", e)
+                self.remove_connection(websocket)
+                return
+        
+        # Update last activity
+        if data is not None:
+            self._touch(data["slot"], now or time.monotonic())
     
     def update_connection_activity(self, websocket):
         """Update last activity timestamp for a connection"""
         try:
-            if websocket in self.connection_data:
-                self.connection_data[websocket]["last_activity"] = datetime.now().isoformat()
+            data = self.connection_data.get(websocket)
+            if data is not None:
+                self._touch(data["slot"], time.monotonic())
         except Exception as e:
-            print(f"Error updating connection activity: {e}")
+            logger.exception("Error updating connection activity: %s", e)
+    
+    def update_connections_activity(self, websockets: Iterable[Any], now: float = None):
+        """Set the same last activity time on many connections"""
+        now = now or time.monotonic()
+        connection_data = self.connection_data
+        touch = self._touch
+        for websocket in websockets:
+            data = connection_data.get(websocket)
+            if data is not None:
+                touch(data["slot"], now)
     
-    def get_conversation_connections(self, conversation_id: int) -> List[Any]:
-        """Get all connections for a specific conversation"""
-        return list(self.conversation_connections.get(conversation_id, set()))
+    def iter_conversation_connections(self, conversation_id: int) -> Iterable[Any]:
+        """Get the live set of connections for a conversation (copy it before mutating while iterating)"""
+        return self.conversation_connections.get(conversation_id, ())
     
     def cleanup_inactive_connections(self, max_inactive_minutes: int = 30):
-        """Clean up connections that have been inactive for too long"""
+        """Clean up connections that have been inactive for too long
+        
+        Only heap entries keyed before the cutoff are visited. An entry whose
+        connection has been active since is re-pushed with its current time.
+        """
         try:
-            from datetime import datetime, timedelta
-            
-            cutoff_time = datetime.now() - timedelta(minutes=max_inactive_minutes)
-            inactive_connections = set()
+            cutoff = time.monotonic() - max_inactive_minutes * 60
+            heap = self._expiry_heap
+            inactive_connections = []
             
-            for websocket, data in self.connection_data.items():
-                last_activity_str = data.get("last_activity", "")
-                if last_activity_str:
-                    try:
-                        last_activity = datetime.fromisoformat(last_activity_str)
-                        if last_activity < cutoff_time:
-                            inactive_connections.add(websocket)
-                    except ValueError:
-                        # If we can't parse the date, consider it inactive
-                        inactive_connections.add(websocket)
+            while heap and heap[0][0] < cutoff:
+                _, seq, websocket = heapq.heappop(heap)
+                data = self.connection_data.get(websocket)
+                if data is None or data["expiry_seq"] != seq:
+                    continue  # Connection removed (or removed and re-added)
+                last_activity = self._last_activity[data["slot"]]
+                if last_activity < cutoff:
+                    inactive_connections.append(websocket)
+                else:
+                    data["expiry_seq"] = self._schedule_expiry(websocket, last_activity)
             
             # Remove inactive connections
             for websocket in inactive_connections:
                 self.remove_connection(websocket)
             
             if inactive_connections:
-                print(f"Cleaned up {len(inactive_connections)} inactive connections")
+                logger.info("Cleaned up %d inactive connections", len(inactive_connections))
                 
         except Exception as e:
-            print(f"Error cleaning up inactive connections: {e}")
+            logger.exception("Error cleaning up inactive connections: %s", e)
     
     def get_service_status(self) -> Dict[str, Any]:
         """Get WebSocket service status"""
         try:
             return {
-                "active_connections": len(self.active_connections),
+                "active_connections": len(self.connection_data),
                 "conversation_connections": len(self.conversation_connections),
                 "total_conversations": len(self.conversation_connections),
                 "service_status": "running",
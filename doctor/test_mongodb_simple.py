@@ -5,6 +5,9 @@ Tests connection to MongoDB Atlas
 """
 
 import os
+import json
+import time
+from functools import lru_cache
 from dotenv import load_dotenv
 import sys
 
@@ -52,9 +55,38 @@ print("=" * 60)
 print("Test 3: DNS Resolution")
 print("=" * 60)
 import socket
+
+_DNS_CACHE_PATH = os.path.expanduser("~/.cache/chatpy_dns.json")
+_DNS_CACHE_TTL_SECONDS = 300
+
+
+@lru_cache(maxsize=64)
+def _resolve(host):
+    """Resolve a host, reusing a fresh answer from a previous run"""
+    try:
+        with open(_DNS_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    
+    cached = cache.get(host)
+    if cached and time.time() - cached[1] < _DNS_CACHE_TTL_SECONDS:
+        return cached[0]
+    
+    ip = socket.gethostbyname(host)
+    cache[host] = (ip, time.time())
+    try:
+        os.makedirs(os.path.dirname(_DNS_CACHE_PATH), exist_ok=True)
+        with open(_DNS_CACHE_PATH, 'w') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+    return ip
+
+
 try:
     host = "cluster0.zhrkdmn.mongodb.net"
-    socket.gethostbyname(host)
+    _resolve(host)
     print(f"✅ DNS resolution successful for {host}")
 except socket.gaierror as e:
     print(f"❌ DNS resolution failed: {e}")
@@ -72,14 +104,22 @@ print("Test 4: MongoDB Connection")
 print("=" * 60)
 try:
     from pymongo import MongoClient
+    from utils.mongo_uri import resolve_srv_uri
     
+    # Connect through the cached seed list so re-runs skip the SRV/TXT lookups
+    connect_uri = resolve_srv_uri(mongo_uri)
     print(f"Attempting to connect to MongoDB...")
-    print(f"Timeout: 10 seconds")
+    print(f"Seed list: {'✅ Pre-resolved' if connect_uri != mongo_uri else 'Not used'}")
+    print(f"Timeout: 5 seconds")
     
     client = MongoClient(
-        mongo_uri,
-        serverSelectionTimeoutMS=10000,  # 10 seconds
-        connectTimeoutMS=10000
+        connect_uri,
+        serverSelectionTimeoutMS=5000,   # 5 seconds
+        connectTimeoutMS=5000,
+        socketTimeoutMS=10000,
+        maxPoolSize=50,
+        maxIdleTimeMS=60000,
+        retryWrites=True
     )
     
     # Try to ping
@@ -4,6 +4,7 @@ Test script to verify ObjectId serialization fix in chat rooms
 import json
 from datetime import datetime
 from bson import ObjectId
+import orjson
 
 # Mock MongoDB document with ObjectId
 mock_room_doc = {
@@ -28,6 +29,13 @@ mock_room_doc = {
     "notifications_enabled_patient": True
 }
 
+def _orjson_default(value):
+    """Serialize ObjectIds that are still present; orjson handles datetime natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError
+
+
 def test_objectid_serialization():
     """Test that ObjectId fields are properly converted to strings"""
 
@@ -43,20 +51,18 @@ def test_objectid_serialization():
     print("\nTesting cleaned document serialization...")
 
     # Apply the same logic as in the repository
-    clean_room_data = {}
-    for key, value in mock_room_doc.items():
-        if hasattr(value, 'generation_time'):  # ObjectId
-            clean_room_data[key] = str(value)
-        else:
-            clean_room_data[key] = value
+    clean_room_data = {
+        key: str(value) if isinstance(value, ObjectId) else value
+        for key, value in mock_room_doc.items()
+    }
 
     try:
-        json_str = json.dumps(clean_room_data, default=str)  # default=str for datetime
+        json_str = orjson.dumps(clean_room_data, default=_orjson_default).decode()
         print("✅ Cleaned document is JSON serializable")
         print(f"Sample JSON: {json_str[:200]}...")
 
         # Verify ObjectId was converted
-        parsed = json.loads(json_str)
+        parsed = orjson.loads(json_str)
         if isinstance(parsed['_id'], str):
             print("✅ ObjectId field converted to string")
         else:
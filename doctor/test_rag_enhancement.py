@@ -193,12 +193,12 @@ def test_rag_system_status():
         else:
             print("❌ Medical knowledge base file not found")
         
-        if os.path.exists("data/vector_db/embeddings.pkl"):
+        if os.path.exists("data/vector_db/embeddings.npy"):
             print("✅ Vector database embeddings exist")
         else:
             print("❌ Vector database embeddings not found")
             
-        if os.path.exists("data/vector_db/chunks.json"):
+        if os.path.exists("data/vector_db/chunks.jsonl"):
             print("✅ Vector database chunks exist")
         else:
             print("❌ Vector database chunks not found")
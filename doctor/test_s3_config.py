@@ -7,6 +7,7 @@ Run this to verify S3 is properly configured
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -48,6 +49,7 @@ print(f"   S3_UPLOAD_ENABLED: {'[OK] Enabled' if s3_enabled else '[ERROR] Disabl
 print("\nboto3 Library:")
 try:
     import boto3
+    from botocore.config import Config
     print("   [OK] boto3 installed")
     print(f"   Version: {boto3.__version__}")
 except ImportError:
@@ -63,15 +65,22 @@ if aws_access_key and aws_secret_key and aws_region and s3_bucket:
             's3',
             aws_access_key_id=aws_access_key,
             aws_secret_access_key=aws_secret_key,
-            region_name=aws_region
+            region_name=aws_region,
+            config=Config(
+                max_pool_connections=50,
+                retries={'max_attempts': 2, 'mode': 'standard'},
+                tcp_keepalive=True
+            )
         )
         
-        # Try to head the bucket
-        s3_client.head_bucket(Bucket=s3_bucket)
-        print(f"   [OK] Successfully connected to bucket: {s3_bucket}")
+        # Head the bucket and list some objects concurrently over the pooled client
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            head_future = executor.submit(s3_client.head_bucket, Bucket=s3_bucket)
+            list_future = executor.submit(s3_client.list_objects_v2, Bucket=s3_bucket, MaxKeys=5)
+            head_future.result()
+            print(f"   [OK] Successfully connected to bucket: {s3_bucket}")
+            response = list_future.result()
         
-        # List some objects
-        response = s3_client.list_objects_v2(Bucket=s3_bucket, MaxKeys=5)
         if 'Contents' in response:
             print(f"   [INFO] Found {len(response['Contents'])} objects in bucket")
             for obj in response['Contents'][:3]:
@@ -4,18 +4,135 @@ JWT Utilities - Handles JWT token generation and verification
 
 import jwt
 import os
+import json
+import time
+import hmac
+import base64
+import hashlib
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from functools import wraps
 from flask import request, jsonify, current_app
 from models.assignment_model import AssignmentModel
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Verified token payloads, keyed by token hash. An entry never outlives the
+# token's own exp claim.
+_TOKEN_CACHE_TTL_SECONDS = int(os.getenv('JWT_CACHE_TTL_SECONDS', '30'))
+_TOKEN_CACHE_MAX_SIZE = 5000
+_token_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_token_cache_lock = threading.Lock()
+
+
+def _token_cache_key(token: str) -> str:
+    """Hash a token so raw credentials are never kept as cache keys"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def _get_cached_token_data(token: str) -> Optional[Dict[str, Any]]:
+    """Return cached user data for a token if still fresh"""
+    key = _token_cache_key(token)
+    entry = _token_cache.get(key)
+    if entry is None:
+        return None
+    
+    expires_at, user_data = entry
+    if expires_at <= time.monotonic():
+        _token_cache.pop(key, None)
+        return None
+    
+    return dict(user_data)
+
+
+def _cache_token_data(token: str, user_data: Dict[str, Any], exp: Optional[float] = None) -> None:
+    """Store verified user data for a token until the TTL or the token's exp, whichever is first"""
+    now = time.monotonic()
+    ttl = _TOKEN_CACHE_TTL_SECONDS
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+    with _token_cache_lock:
+        if len(_token_cache) >= _TOKEN_CACHE_MAX_SIZE:
+            # Drop expired entries first, then the oldest if still full
+            for key in [k for k, (expires_at, _) in _token_cache.items() if expires_at <= now]:
+                del _token_cache[key]
+            if len(_token_cache) >= _TOKEN_CACHE_MAX_SIZE:
+                _token_cache.pop(next(iter(_token_cache)))
+        _token_cache[_token_cache_key(token)] = (now + ttl, dict(user_data))
+
+
+def _b64url_decode(segment: str) -> bytes:
+    """Decode an unpadded base64url JWT segment"""
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def _verify_hs256(token: str, key: bytes) -> Dict[str, Any]:
+    """Verify an HS256 token and return its claims
+    
+    A direct HMAC check in place of jwt.decode for the per-request path. Raises
+    the same jwt.ExpiredSignatureError / jwt.InvalidTokenError as PyJWT.
+    """
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    try:
+        header_segment, payload_segment, signature_segment = token.split('.')
+        header = loads(_b64url_decode(header_segment))
+        signature = _b64url_decode(signature_segment)
+    except ValueError as e:
+        raise jwt.DecodeError(f"Malformed token: {e}")
+    
+    # Only HS256 is accepted, whatever the header claims
+    if not isinstance(header, dict) or header.get('alg') != 'HS256':
+        raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+    
+    signing_input = f"{header_segment}.{payload_segment}".encode()
+    expected = hmac.new(key, signing_input, hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise jwt.InvalidSignatureError("Signature verification failed")
+    
+    try:
+        payload = loads(_b64url_decode(payload_segment))
+    except ValueError as e:
+        raise jwt.DecodeError(f"Invalid payload: {e}")
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload")
+    
+    now = time.time()
+    exp = payload.get('exp')
+    if exp is not None:
+        if not isinstance(exp, (int, float)):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be a number")
+        if exp <= now:
+            raise jwt.ExpiredSignatureError("Signature has expired")
+    nbf = payload.get('nbf')
+    if nbf is not None:
+        if not isinstance(nbf, (int, float)):
+            raise jwt.DecodeError("Not Before claim (nbf) must be a number")
+        if nbf > now:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+    iat = payload.get('iat')
+    if iat is not None:
+        if not isinstance(iat, (int, float)):
+            raise jwt.InvalidIssuedAtError("Issued At claim (iat) must be an integer.")
+        if iat > now:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (iat)")
+    
+    return payload
+
 
 class JWTUtils:
     """JWT token utilities"""
     
     def __init__(self):
         self.secret_key = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-this')
+        self._secret_key_bytes = self.secret_key.encode()
         self.algorithm = 'HS256'
         self.expiration_hours = int(os.getenv('JWT_EXPIRATION_HOURS', '24'))
     
@@ -40,9 +157,13 @@ class JWTUtils:
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify JWT token and return payload"""
+        payload = self.verify_token_claims(token)
+        return payload.get('data') if payload else None
+    
+    def verify_token_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verify JWT token and return all of its claims"""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload.get('data')
+            return _verify_hs256(token, self._secret_key_bytes)
             
         except jwt.ExpiredSignatureError:
             print("Token has expired")
@@ -72,22 +193,33 @@ class JWTUtils:
             return None
 
 
+# Shared by the auth decorators so config is read once, not on every request
+_JWT = JWTUtils()
+
+
 def require_auth(f):
-    """Decorator to require authentication"""
+    """Decorator to require authentication
+    
+    current_user is built from the verified token claims (user_id, email,
+    role, name); no user lookup is made against the database.
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
             # Get token from header
-            jwt_utils = JWTUtils()
-            token = jwt_utils.get_token_from_header(request)
+            token = _JWT.get_token_from_header(request)
             
             if not token:
                 return jsonify({'error': 'Authorization token required'}), 401
             
-            # Verify token
-            user_data = jwt_utils.verify_token(token)
-            if not user_data:
-                return jsonify({'error': 'Invalid or expired token'}), 401
+            # Verify token, reusing a recent verification when available
+            user_data = _get_cached_token_data(token)
+            if user_data is None:
+                claims = _JWT.verify_token_claims(token)
+                user_data = claims.get('data') if claims else None
+                if not user_data:
+                    return jsonify({'error': 'Invalid or expired token'}), 401
+                _cache_token_data(token, user_data, claims.get('exp'))
             
             # Add user data to kwargs
             kwargs['current_user'] = user_data
@@ -102,6 +234,12 @@ def require_auth(f):
 
 def require_roles(*allowed_roles):
     """Decorator to require specific roles"""
+    # Built once per decorated route, not per request. There is no per-(user, endpoint)
+    # permission cache: the role comes from the verified token, so the check is one set
+    # lookup, cheaper than a cache probe, and a cache would outlive role changes.
+    allowed = frozenset(allowed_roles)
+    forbidden_message = f'Insufficient permissions. Required roles: {allowed_roles}'
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -113,8 +251,8 @@ def require_roles(*allowed_roles):
                 
                 # Check if user has required role
                 user_role = current_user.get('role')
-                if user_role not in allowed_roles:
-                    return jsonify({'error': f'Insufficient permissions. Required roles: {allowed_roles}'}), 403
+                if user_role not in allowed:
+                    return jsonify({'error': forbidden_message}), 403
                 
                 return f(*args, **kwargs)
                 
@@ -0,0 +1,105 @@
+"""
+MongoDB URI helpers - Pre-resolve mongodb+srv:// URIs to a cached seed list
+"""
+
+import os
+import json
+import time
+import logging
+from urllib.parse import parse_qsl, urlencode
+
+try:
+    import dns.resolver
+    DNS_AVAILABLE = True
+except ImportError:
+    DNS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_SRV_SCHEME = 'mongodb+srv://'
+_SEED_CACHE_PATH = os.path.expanduser(os.getenv('MONGO_SEED_CACHE', '~/.cache/chatpy_mongo_seeds.json'))
+_DNS_TIMEOUT_SECONDS = 5.0
+# Only these options may come from the Atlas TXT record (MongoDB SRV spec)
+_TXT_OPTIONS = frozenset(('authSource', 'replicaSet', 'loadBalanced'))
+
+
+def _load_seed_cache():
+    """Load the on-disk seed list cache, ignoring a missing or corrupt file"""
+    try:
+        with open(_SEED_CACHE_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_seed_cache(cache):
+    """Atomically write the seed list cache"""
+    try:
+        os.makedirs(os.path.dirname(_SEED_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{_SEED_CACHE_PATH}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, _SEED_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"Could not write MongoDB seed cache: {e}")
+
+
+def _lookup_seeds(host):
+    """Resolve the SRV and TXT records of an Atlas host"""
+    resolver = dns.resolver.Resolver()
+    resolver.lifetime = _DNS_TIMEOUT_SECONDS
+    answer = resolver.resolve(f'_mongodb._tcp.{host}', 'SRV')
+    hosts = [f"{str(r.target).rstrip('.')}:{r.port}" for r in answer]
+    ttl = answer.rrset.ttl
+    options = {}
+    try:
+        for record in resolver.resolve(host, 'TXT'):
+            txt = b''.join(record.strings).decode()
+            options.update((k, v) for k, v in parse_qsl(txt) if k in _TXT_OPTIONS)
+    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+        pass
+    return {'hosts': hosts, 'options': options, 'expires': time.time() + ttl}
+
+
+def resolve_srv_uri(uri):
+    """
+    Rewrite a mongodb+srv:// URI as a mongodb:// seed list URI
+
+    The SRV/TXT lookup is done once and cached on disk for the record TTL,
+    so later processes skip both DNS round trips. Any failure returns the
+    original URI and leaves SRV resolution to PyMongo.
+
+    Args:
+        uri: MongoDB connection string
+
+    Returns:
+        str: Seed list URI, or the original URI
+    """
+    if not uri or not uri.startswith(_SRV_SCHEME) or not DNS_AVAILABLE:
+        return uri
+
+    try:
+        rest = uri[len(_SRV_SCHEME):]
+        userinfo, _, rest = rest.rpartition('@')
+        split_at = min((i for i in (rest.find('/'), rest.find('?')) if i != -1), default=len(rest))
+        host, tail = rest[:split_at], rest[split_at:]
+        path, _, query = tail.partition('?')
+
+        cache = _load_seed_cache()
+        entry = cache.get(host)
+        if not entry or entry['expires'] < time.time():
+            entry = _lookup_seeds(host)
+            cache[host] = entry
+            _save_seed_cache(cache)
+
+        # Options in the URI take precedence over the TXT record; SRV implies TLS
+        options = dict(entry['options'])
+        options.update(parse_qsl(query))
+        if 'tls' not in options and 'ssl' not in options:
+            options['tls'] = 'true'
+
+        credentials = f"{userinfo}@" if userinfo else ''
+        return f"mongodb://{credentials}{','.join(entry['hosts'])}{path or '/'}?{urlencode(options)}"
+    except Exception as e:
+        logger.warning(f"SRV pre-resolution failed, using original URI: {e}")
+        return uri